@@ -28,11 +28,16 @@ SOFTWARE.
 
 import sys
 import os
-import subprocess
 import time
+startup_time = time.perf_counter()
 import configparser
 import json
-import webbrowser
+import re
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict, deque, namedtuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 from PyQt5.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -45,17 +50,15 @@ from PyQt5.QtWidgets import (
     QTextEdit,
     QFileDialog,
     QLabel,
+    QListWidget,
+    QListWidgetItem,
+    QListView,
+    QMessageBox,
 )
-from PyQt5.QtCore import Qt, QTimer, QProcess
-from PyQt5.QtGui import QPainter, QColor, QFont, QIcon
+from PyQt5.QtCore import Qt, QTimer, QProcess, QObject, QThread, QCoreApplication, QAbstractListModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QPainter, QColor, QFont, QIcon, QKeySequence
 from PyQt5.QtWidgets import QGraphicsDropShadowEffect
 
-try:
-    from PyQt5.QtWinExtras import QWinTaskbarButton
-    windows_taskbar_available = True
-except ImportError:
-    windows_taskbar_available = False
-
 translations = {
     "ru": {
         "window_title": "Flux",
@@ -85,7 +88,18 @@ translations = {
         "get_cookies": "Где взять куки?",
         "download_label": "Что скачать?",
         "params_label": "Параметры",
-        "youtube_cookie_error": "Ошибка скачивания: неизвестная ошибка или файл cookies устарел либо не выбран."
+        "youtube_cookie_error": "Ошибка скачивания: неизвестная ошибка или файл cookies устарел либо не выбран.",
+        "job_queued": "В очереди",
+        "job_completed": "Готово",
+        "job_failed": "Ошибка",
+        "job_canceled": "Отменено",
+        "rate_limited": "{domain} ограничивает запросы, скачивание замедлено",
+        "resume_prompt": "Незавершённых загрузок с прошлого запуска: {count}. Продолжить их?",
+        "load_list": "Список",
+        "urls_queued": "Добавлено ссылок: {count}, пропущено повторов: {duplicates}",
+        "watch": "Следить",
+        "watch_added": "Отслеживается источников: {count}, новые видео будут скачиваться автоматически",
+        "watch_removed": "Больше не отслеживается источников: {count}"
     },
     "en": {
         "window_title": "Flux",
@@ -115,24 +129,567 @@ translations = {
         "get_cookies": "Where to get cookies?",
         "download_label": "What to download?",
         "params_label": "Parameters",
-        "youtube_cookie_error": "Download error: Unknown error, or your cookies file is either outdated or not selected."
+        "youtube_cookie_error": "Download error: Unknown error, or your cookies file is either outdated or not selected.",
+        "job_queued": "Queued",
+        "job_completed": "Done",
+        "job_failed": "Failed",
+        "job_canceled": "Canceled",
+        "rate_limited": "{domain} is rate limiting requests, slowing down",
+        "resume_prompt": "{count} download(s) were left unfinished last time. Resume them?",
+        "load_list": "List",
+        "urls_queued": "Queued {count} links, skipped {duplicates} duplicates",
+        "watch": "Watch",
+        "watch_added": "Watching {count} sources, new videos will be downloaded automatically",
+        "watch_removed": "Stopped watching {count} sources"
     }
 }
 
+def get_bin_path():
+    if getattr(sys, "frozen", False):
+        base_path = sys._MEIPASS
+    else:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_path, "bin")
+
 def get_yt_dlp_path():
+    override = os.environ.get("FLUX_YT_DLP")
+    if override:
+        return override
+    bin_path = get_bin_path()
+    for name in ("yt-dlp.exe", "yt-dlp"):
+        path = os.path.join(bin_path, name)
+        if os.path.exists(path):
+            return path
+    import shutil
+    path = shutil.which("yt-dlp")
+    if not path:
+        raise FileNotFoundError(f"yt-dlp not found in {bin_path} or PATH")
+    return path
+
+def yt_dlp_command(path, args):
+    if path.endswith(".py"):
+        return sys.executable, [path] + list(args)
+    return path, list(args)
+
+creation_flags = 0x08000000 if sys.platform == "win32" else 0
+
+def get_ffmpeg_path():
+    bin_path = get_bin_path()
+    for name in ("ffmpeg.exe", "ffmpeg"):
+        path = os.path.join(bin_path, name)
+        if os.path.exists(path):
+            return path
+    import shutil
+    return shutil.which("ffmpeg") or ""
+
+def file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return ""
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+def probe_version(path, timeout=15):
+    import subprocess
+    program, args = yt_dlp_command(path, ["--version"])
+    try:
+        result = subprocess.run([program] + args, capture_output=True, text=True, encoding="utf-8", timeout=timeout, creationflags=creation_flags)
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    return result.stdout.strip().splitlines()[0] if result.returncode == 0 and result.stdout.strip() else ""
+
+Binaries = namedtuple("Binaries", "yt_dlp_path yt_dlp_version ffmpeg_path")
+
+def cached_binary(cache, key, locate):
+    path = cache.get(f"{key}_path", "")
+    signature = cache.get(f"{key}_signature", "")
+    if path and signature and file_signature(path) == signature:
+        return path, False
     try:
-        if getattr(sys, "frozen", False):
-            base_path = sys._MEIPASS
+        return locate(), True
+    except FileNotFoundError:
+        return "", True
+
+def discover_binaries(cache=None):
+    cache = dict(cache or {})
+    if os.environ.get("FLUX_YT_DLP"):
+        cache = {}
+    yt_dlp_path, changed = cached_binary(cache, "yt_dlp", get_yt_dlp_path)
+    version = cache.get("yt_dlp_version", "") if not changed else ""
+    if yt_dlp_path and not version:
+        version = probe_version(yt_dlp_path)
+    ffmpeg_path, _ = cached_binary(cache, "ffmpeg", get_ffmpeg_path)
+    return Binaries(yt_dlp_path, version, ffmpeg_path)
+
+def binaries_cache(binaries):
+    return {
+        "yt_dlp_path": binaries.yt_dlp_path,
+        "yt_dlp_signature": file_signature(binaries.yt_dlp_path) if binaries.yt_dlp_path else "",
+        "yt_dlp_version": binaries.yt_dlp_version,
+        "ffmpeg_path": binaries.ffmpeg_path,
+        "ffmpeg_signature": file_signature(binaries.ffmpeg_path) if binaries.ffmpeg_path else "",
+    }
+
+class BinaryLocator(QThread):
+    resolved = pyqtSignal(object)
+
+    def __init__(self, cache=None, parent=None):
+        super().__init__(parent)
+        self.cache = dict(cache or {})
+        self.finished.connect(self.deleteLater)
+
+    def run(self):
+        self.resolved.emit(discover_binaries(self.cache))
+
+def trace_startup(stage):
+    if os.environ.get("FLUX_STARTUP_TRACE"):
+        print(f"startup {stage} {time.perf_counter() - startup_time:.4f}", flush=True)
+
+def open_url(url):
+    import webbrowser
+    webbrowser.open(url)
+
+engine_modes = ("internal", "external")
+yt_dlp_module = None
+
+def import_yt_dlp():
+    global yt_dlp_module
+    if yt_dlp_module is None:
+        try:
+            import yt_dlp
+            yt_dlp_module = yt_dlp
+        except ImportError:
+            yt_dlp_module = False
+    return yt_dlp_module or None
+
+tracking_params = {"si", "feature", "pp", "fbclid", "gclid", "igshid", "ref", "ref_src"}
+playlist_entry_fields = ("_type", "ie_key", "id", "url", "title", "duration", "playlist", "playlist_id", "playlist_title", "extractor", "extractor_key")
+
+def is_youtube_host(host):
+    return host in ("youtube.com", "youtu.be") or host.endswith(".youtube.com")
+
+def canonical_playlist_url(url):
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if not is_youtube_host(host):
+        # Other sites may depend on any parameter and on their order.
+        return urlunsplit(parts._replace(fragment=""))
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    playlist_id = dict(query).get("list")
+    if playlist_id:
+        return f"https://www.youtube.com/playlist?list={playlist_id}"
+    query = sorted((key, value) for key, value in query if key not in tracking_params and not key.startswith("utm_"))
+    return urlunsplit((parts.scheme.lower() or "https", host, parts.path.rstrip("/"), urlencode(query), ""))
+
+youtube_video_paths = ("/shorts/", "/embed/", "/live/", "/v/")
+url_pattern = re.compile(r"(?:https?://|www\.|youtu\.be/)[^\s\"'<>,;|]+", re.IGNORECASE)
+
+def canonical_url(url, download_type=None):
+    url = url.strip()
+    if not re.match(r"^[a-z][a-z0-9+.-]*://", url, re.IGNORECASE):
+        url = "https://" + url
+    parts = urlsplit(url)
+    host = parts.netloc.lower().rsplit("@", 1)[-1].split(":")[0]
+    query = dict(parse_qsl(parts.query))
+    if is_youtube_host(host):
+        if download_type == "playlist" and query.get("list"):
+            return ("youtube:playlist", query["list"]), canonical_playlist_url(url)
+        video_id = None
+        if host == "youtu.be":
+            video_id = parts.path.strip("/").split("/")[0]
+        elif parts.path == "/watch":
+            video_id = query.get("v")
         else:
-            base_path = os.path.dirname(os.path.abspath(__file__))
-        path = os.path.join(base_path, "bin", "yt-dlp.exe")
-        if not os.path.exists(path):
-            raise FileNotFoundError(f"yt-dlp.exe not found at {path}")
-        return path
-    except Exception as e:
-        raise
+            for prefix in youtube_video_paths:
+                if parts.path.startswith(prefix):
+                    video_id = parts.path[len(prefix):].split("/")[0]
+                    break
+        if video_id:
+            return ("youtube", video_id), f"https://www.youtube.com/watch?v={video_id}"
+        if query.get("list"):
+            return ("youtube:playlist", query["list"]), canonical_playlist_url(url)
+    canonical = canonical_playlist_url(url)
+    return ("url", canonical), canonical
+
+def watch_url(url):
+    url = canonical_url(url, "playlist")[1]
+    parts = urlsplit(url)
+    # A channel's front page lists its tabs rather than its videos.
+    if is_youtube_host(parts.netloc) and re.fullmatch(r"/(@[^/]+|(channel|c|user)/[^/]+)/?", parts.path):
+        return urlunsplit(parts._replace(path=parts.path.rstrip("/") + "/videos"))
+    return url
+
+def extract_urls(text):
+    return [match.rstrip(".,)]}>!?'\"") for match in url_pattern.findall(text)]
+
+def unique_urls(urls, download_type=None, seen=None):
+    seen = set() if seen is None else seen
+    unique = []
+    for url in urls:
+        key, canonical = canonical_url(url, download_type)
+        if key not in seen:
+            seen.add(key)
+            unique.append(canonical)
+    return unique
+
+def request_domain(url):
+    host = urlsplit(url.strip()).netloc.lower().rsplit("@", 1)[-1].split(":")[0]
+    if host == "youtu.be" or host.endswith(".youtube.com"):
+        return "youtube.com"
+    labels = host.split(".")
+    if len(labels) > 2 and len(labels[-1]) == 2 and len(labels[-2]) <= 3:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+def detect_download_type(url):
+    parts = urlsplit(url.strip())
+    query = dict(parse_qsl(parts.query))
+    path = parts.path.lower()
+    if path.startswith(("/playlist", "/@", "/channel/", "/c/", "/user/")) or ("list" in query and "v" not in query):
+        return "playlist"
+    return "single"
+
+def read_url_list(lines, download_type=None):
+    urls = []
+    for line in lines:
+        if not line.strip().startswith("#"):
+            urls.extend(extract_urls(line))
+    return unique_urls(urls, download_type)
+
+def read_request_rates(config):
+    rates = {}
+    if config.has_section("Pacing"):
+        for domain, rate in config.items("Pacing"):
+            try:
+                rates[domain] = float(rate)
+            except ValueError:
+                pass
+    return rates
 
-yt_dlp_path = get_yt_dlp_path()
+def read_concurrent_fragments(value):
+    value = str(value).strip().lower()
+    if value == "auto":
+        return 0
+    try:
+        return max(1, int(value))
+    except ValueError:
+        return 0
+
+rate_pattern = re.compile(r"^(\d+(?:\.\d+)?)\s*([kmg]?)(?:i?b)?(?:/s)?$", re.IGNORECASE)
+
+def read_rate(value):
+    match = rate_pattern.match(str(value).strip())
+    if not match:
+        return 0
+    return int(float(match.group(1)) * 1024 ** " kmg".index(match.group(2).lower() or " "))
+
+def read_clock(value):
+    hours, minutes = value.strip().split(":")
+    if not (0 <= int(hours) < 24 and 0 <= int(minutes) < 60):
+        raise ValueError(value)
+    return int(hours) * 60 + int(minutes)
+
+def read_bandwidth_schedule(value):
+    schedule = []
+    for item in re.split(r"[,;]", value or ""):
+        try:
+            window, rate = item.split()
+            start, end = window.split("-")
+            schedule.append((read_clock(start), read_clock(end), read_rate(rate)))
+        except ValueError:
+            pass
+    return schedule
+
+def compact_playlist_entry(entry):
+    return {key: entry[key] for key in playlist_entry_fields if entry.get(key) is not None}
+
+def build_playlist_info(url, entries):
+    first = entries[0] if entries else {}
+    return {
+        "_type": "playlist",
+        "id": first.get("playlist_id"),
+        "title": first.get("playlist_title") or first.get("playlist"),
+        "webpage_url": url,
+        "extractor": first.get("extractor"),
+        "extractor_key": first.get("extractor_key"),
+        "entries": [dict(entry, _type=entry.get("_type", "url")) for entry in entries],
+    }
+
+class RequestPacer:
+    penalty_cooldown = 30.0
+
+    def __init__(self, rates=None, default_rate=0.0, max_sleep=64.0, recovery_successes=5):
+        self.rates = rates or {}
+        self.default_rate = default_rate
+        self.max_sleep = max_sleep
+        self.recovery_successes = recovery_successes
+        self.domains = {}
+
+    def state(self, domain):
+        state = self.domains.get(domain)
+        if state is None:
+            state = self.domains[domain] = {
+                "tokens": 1.0,
+                "updated": time.monotonic(),
+                "level": 0,
+                "successes": 0,
+                "penalized": float("-inf")
+            }
+        return state
+
+    def sleep_interval(self, domain):
+        state = self.state(domain)
+        rate = self.rates.get(domain, self.default_rate)
+        interval = 1.0 / rate if rate > 0 else 0.0
+        if state["level"]:
+            interval = max(interval, min(2.0 ** (state["level"] - 1), self.max_sleep))
+        return interval
+
+    def acquire(self, domain):
+        interval = self.sleep_interval(domain)
+        if interval <= 0:
+            return 0.0
+        state = self.state(domain)
+        now = time.monotonic()
+        state["tokens"] = min(1.0, state["tokens"] + (now - state["updated"]) / interval)
+        state["updated"] = now
+        if state["tokens"] >= 1.0:
+            state["tokens"] -= 1.0
+            return 0.0
+        return (1.0 - state["tokens"]) * interval
+
+    def penalize(self, domain):
+        state = self.state(domain)
+        now = time.monotonic()
+        if now - state["penalized"] < self.penalty_cooldown:
+            return False
+        if 2.0 ** (state["level"] - 1) < self.max_sleep:
+            state["level"] += 1
+        state["penalized"] = now
+        state["successes"] = 0
+        state["tokens"] = 0.0
+        state["updated"] = now
+        return True
+
+    def reward(self, domain):
+        state = self.state(domain)
+        if not state["level"]:
+            return
+        state["successes"] += 1
+        if state["successes"] >= self.recovery_successes:
+            state["level"] -= 1
+            state["successes"] = 0
+
+class FragmentTuner:
+    min_trial_bytes = 4 * 1024 * 1024
+
+    def __init__(self, fragments=0, budget=16, max_fragments=16, initial_fragments=4):
+        self.fragments = fragments
+        self.budget = max(1, budget)
+        self.max_fragments = max_fragments
+        self.initial_fragments = initial_fragments
+        self.jobs = {}
+        self.learned = {}
+
+    def available(self, job):
+        return self.budget - sum(state["fragments"] for other, state in self.jobs.items() if other is not job)
+
+    def allocate(self, job):
+        wanted = self.fragments or self.learned.get(job.domain, self.initial_fragments)
+        fragments = max(1, min(wanted, self.max_fragments, self.available(job)))
+        self.jobs[job] = {"fragments": fragments, "direction": 1, "rate": None, "streams": {}}
+        return fragments
+
+    def release(self, job):
+        self.jobs.pop(job, None)
+
+    def observe(self, job, stream, status, downloaded, now=None):
+        state = self.jobs.get(job)
+        if self.fragments or state is None or downloaded is None:
+            return None
+        now = time.monotonic() if now is None else now
+        started, start_bytes = state["streams"].setdefault(stream, (now, downloaded))
+        if status != "finished":
+            return None
+        del state["streams"][stream]
+        size, elapsed = downloaded - start_bytes, now - started
+        if size < self.min_trial_bytes or elapsed <= 0:
+            return None
+        return self.step(job, size / elapsed)
+
+    def step(self, job, rate):
+        state = self.jobs[job]
+        if state["rate"] is not None and rate < state["rate"] * 0.95:
+            state["direction"] = -state["direction"]
+        limit = max(1, min(self.max_fragments, self.available(job)))
+        fragments = state["fragments"] + state["direction"]
+        if not 1 <= fragments <= limit:
+            state["direction"] = -state["direction"]
+            fragments = state["fragments"] + state["direction"]
+        fragments = max(1, min(fragments, limit))
+        state["rate"] = rate
+        self.learned[job.domain] = fragments
+        if fragments == state["fragments"]:
+            return None
+        state["fragments"] = fragments
+        return fragments
+
+class BandwidthShaper:
+    idle_share = 64 * 1024
+    headroom = 1.5
+
+    def __init__(self, limit=0, schedule=()):
+        self.limit = limit
+        self.schedule = list(schedule)
+
+    def limit_at(self, now=None):
+        local = time.localtime(now)
+        minute = local.tm_hour * 60 + local.tm_min
+        for start, end, rate in self.schedule:
+            if start <= minute < end if start <= end else minute >= start or minute < end:
+                return rate
+        return self.limit
+
+    def split(self, demands, total):
+        shares = {}
+        pending = sorted(demands.items(), key=lambda item: item[1])
+        while pending:
+            share = total / len(pending)
+            job, demand = pending[0]
+            if demand >= share:
+                for job, _ in pending:
+                    shares[job] = share
+                return shares
+            shares[job] = demand
+            total -= demand
+            pending.pop(0)
+        # Every job got what it asks for, so let them all grow into the rest.
+        for job in shares:
+            shares[job] += total / len(shares)
+        return shares
+
+    def allocate(self, jobs, starting=None, slots=1, now=None):
+        limit = self.limit_at(now)
+        if limit <= 0:
+            return {job: 0 for job in jobs}
+        fixed = [job for job in jobs if job.process and not job.process.live_tuning]
+        total = max(limit - sum(job.rate_limit or sum(job.speeds.values()) for job in fixed), 0)
+        demands = {}
+        for job in jobs:
+            if job in fixed:
+                continue
+            if job is starting:
+                demands[job] = total
+            elif job.speeds:
+                demands[job] = sum(job.speeds.values()) * self.headroom + self.idle_share
+            else:
+                demands[job] = self.idle_share
+        if not any(job.speeds for job in demands):
+            demands = dict.fromkeys(demands, total)
+        shares = self.split(demands, total)
+        if starting in shares:
+            # Keep room for the jobs about to start alongside this one.
+            shares[starting] = min(shares[starting], limit / max(slots, 1))
+        shares = {job: max(int(share), 1) for job, share in shares.items()}
+        shares.update((job, job.rate_limit) for job in fixed)
+        return shares
+
+class PlaylistCache:
+    def __init__(self, path, ttl=21600, max_bytes=64 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS playlist_cache ("
+            "url TEXT PRIMARY KEY, fetched_at REAL NOT NULL, accessed_at REAL NOT NULL, "
+            "size INTEGER NOT NULL, entries TEXT NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS playlist_cache_accessed ON playlist_cache (accessed_at)")
+        self.connection.commit()
+
+    def get(self, url):
+        try:
+            row = self.connection.execute("SELECT fetched_at, entries FROM playlist_cache WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[0] > self.ttl:
+                self.connection.execute("DELETE FROM playlist_cache WHERE url = ?", (url,))
+                self.connection.commit()
+                return None
+            self.connection.execute("UPDATE playlist_cache SET accessed_at = ? WHERE url = ?", (now, url))
+            self.connection.commit()
+            return json.loads(row[1])
+        except (sqlite3.Error, ValueError):
+            return None
+
+    def put(self, url, entries):
+        data = json.dumps([compact_playlist_entry(entry) for entry in entries], ensure_ascii=False)
+        now = time.time()
+        try:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO playlist_cache (url, fetched_at, accessed_at, size, entries) VALUES (?, ?, ?, ?, ?)",
+                (url, now, now, len(data.encode("utf-8")), data)
+            )
+            self.evict()
+            self.connection.commit()
+        except sqlite3.Error:
+            pass
+
+    def evict(self):
+        self.connection.execute("DELETE FROM playlist_cache WHERE fetched_at < ?", (time.time() - self.ttl,))
+        total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM playlist_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self.connection.execute("SELECT url, size FROM playlist_cache ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self.connection.execute("DELETE FROM playlist_cache WHERE url = ?", (url,))
+            total -= size
+
+class UrlInput(QLineEdit):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAcceptDrops(True)
+
+    def insert_urls(self, text):
+        urls = extract_urls(text)
+        text = " ".join(urls) if urls else " ".join(text.split())
+        if text and self.cursorPosition() > 0 and not self.text()[:self.cursorPosition()].endswith(" "):
+            text = " " + text
+        self.insert(text)
+
+    def load_files(self, paths):
+        for path in paths:
+            try:
+                with open(path, "r", encoding="utf-8-sig", errors="ignore") as f:
+                    self.insert_urls(" ".join(read_url_list(f)))
+            except OSError:
+                pass
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Paste):
+            self.insert_urls(QApplication.clipboard().text())
+            return
+        super().keyPressEvent(event)
+
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls() or event.mimeData().hasText():
+            event.acceptProposedAction()
+        else:
+            super().dragEnterEvent(event)
+
+    def dropEvent(self, event):
+        mime_data = event.mimeData()
+        files = [url.toLocalFile() for url in mime_data.urls() if url.isLocalFile()]
+        if files:
+            self.load_files(files)
+        elif mime_data.hasText():
+            self.insert_urls(mime_data.text())
+        else:
+            super().dropEvent(event)
+            return
+        event.acceptProposedAction()
 
 class DownloadButton(QPushButton):
     def __init__(self, text, parent=None, language="en"):
@@ -175,7 +732,10 @@ class DownloadButton(QPushButton):
         self.update()
 
     def set_progress(self, value):
-        self.progress = min(max(value, 0), 99)
+        value = min(max(value, 0), 99)
+        if self.current_state == "progress" and int(value) == int(self.progress):
+            return
+        self.progress = value
         self.completed = False
         self.waiting = False
         self.current_state = "progress"
@@ -240,42 +800,2345 @@ class DownloadButton(QPushButton):
         painter.setFont(self.font())
         painter.drawText(self.rect(), Qt.AlignCenter, self.text())
 
+def archive_key(entry):
+    return (entry.get("ie_key") or entry.get("extractor_key") or "").lower(), str(entry.get("id") or "")
+
+class DownloadArchive:
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS download_archive ("
+            "scope TEXT NOT NULL, extractor TEXT NOT NULL, video_id TEXT NOT NULL, completed_at REAL NOT NULL, "
+            "PRIMARY KEY (scope, extractor, video_id))"
+        )
+        self.connection.commit()
+
+    def has_scope(self, scope):
+        try:
+            return self.connection.execute("SELECT 1 FROM download_archive WHERE scope = ? LIMIT 1", (scope,)).fetchone() is not None
+        except sqlite3.Error:
+            return False
+
+    def filter_new(self, scope, entries):
+        try:
+            done = set(self.connection.execute("SELECT extractor, video_id FROM download_archive WHERE scope = ?", (scope,)))
+        except sqlite3.Error:
+            return entries
+        return [entry for entry in entries if archive_key(entry) not in done]
+
+    def add(self, scope, extractor, video_id):
+        try:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO download_archive (scope, extractor, video_id, completed_at) VALUES (?, ?, ?, ?)",
+                (scope, extractor.lower(), video_id, time.time())
+            )
+            self.connection.commit()
+        except sqlite3.Error:
+            pass
+
+download_format = "bv+ba[acodec=opus][language=ru]+ba[acodec=opus][language=en]/ba[acodec=aac][language=ru]+ba[acodec=aac][language=en]/bv+ba/b"
+metadata_format_fields = ("format_id", "ext", "resolution", "filesize")
+
+def compact_metadata(info):
+    filesize = info.get("filesize") or info.get("filesize_approx")
+    if not filesize:
+        filesize = sum(f.get("filesize") or f.get("filesize_approx") or 0 for f in info.get("requested_formats") or ()) or None
+    return {
+        "title": info.get("title") or "",
+        "duration": info.get("duration"),
+        "filesize": filesize,
+        "formats": [{key: f[key] for key in metadata_format_fields if f.get(key) is not None} for f in info.get("formats") or ()],
+    }
+
+class MetadataCache:
+    memory_size = 512
+
+    def __init__(self, path, ttl=86400):
+        self.ttl = ttl
+        self.memory = OrderedDict()
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS video_metadata (key TEXT PRIMARY KEY, fetched_at REAL NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self.connection.commit()
+
+    def key(self, url):
+        return ":".join(canonical_url(url, "single")[0])
+
+    def remember(self, key, fetched_at, metadata):
+        self.memory[key] = (fetched_at, metadata)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def get(self, url):
+        key = self.key(url)
+        cached = self.memory.get(key)
+        if cached is None:
+            try:
+                row = self.connection.execute("SELECT fetched_at, metadata FROM video_metadata WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                cached = (row[0], json.loads(row[1]))
+            except (sqlite3.Error, ValueError):
+                return None
+        if time.time() - cached[0] > self.ttl:
+            self.memory.pop(key, None)
+            return None
+        self.remember(key, *cached)
+        return cached[1]
+
+    def put(self, url, metadata):
+        key = self.key(url)
+        now = time.time()
+        self.remember(key, now, metadata)
+        try:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO video_metadata (key, fetched_at, metadata) VALUES (?, ?, ?)",
+                (key, now, json.dumps(metadata, ensure_ascii=False))
+            )
+            self.connection.execute("DELETE FROM video_metadata WHERE fetched_at < ?", (now - self.ttl,))
+            self.connection.commit()
+        except sqlite3.Error:
+            pass
+
+expire_pattern = re.compile(r"[?&/]expire[=/](\d+)")
+
+def info_expiry(info, default):
+    expiries = []
+    for item in [info] + list(info.get("requested_formats") or ()) + list(info.get("formats") or ()):
+        for url in (item.get("url"), item.get("manifest_url")):
+            match = expire_pattern.search(url) if isinstance(url, str) else None
+            if match:
+                expiries.append(int(match.group(1)))
+    return min(expiries) if expiries else default
+
+def entry_url(entry):
+    return entry.get("url") or entry.get("webpage_url") or ""
+
+def read_info_lines(lines):
+    for line in lines:
+        try:
+            yield json.loads(line)
+        except ValueError:
+            pass
+
+class InfoStore:
+    refresh_margin = 600
+
+    def __init__(self, path, ttl=1800, max_bytes=256 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS info_json ("
+            "key TEXT PRIMARY KEY, expires_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL, info BLOB NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS info_json_accessed ON info_json (accessed_at)")
+        self.connection.commit()
+        self.total = None
+
+    def key(self, url):
+        return ":".join(canonical_url(url, "single")[0])
+
+    def get(self, url):
+        return self.get_many([url]).get(url)
+
+    def get_many(self, urls):
+        found = {}
+        touched = []
+        stale = []
+        now = time.time()
+        try:
+            for url in set(filter(None, urls)):
+                key = self.key(url)
+                row = self.connection.execute("SELECT expires_at, info FROM info_json WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    continue
+                if row[0] - now < self.refresh_margin:
+                    stale.append((key,))
+                    continue
+                try:
+                    found[url] = json.loads(zlib.decompress(row[1]))
+                    touched.append((now, key))
+                except (zlib.error, ValueError):
+                    stale.append((key,))
+            if not touched and not stale:
+                return found
+            # All lookups of one batch share a single transaction.
+            self.connection.executemany("UPDATE info_json SET accessed_at = ? WHERE key = ?", touched)
+            if stale:
+                self.connection.executemany("DELETE FROM info_json WHERE key = ?", stale)
+                self.total = None
+            self.connection.commit()
+        except sqlite3.Error:
+            pass
+        return found
+
+    def put(self, info):
+        self.put_many([info])
+
+    def put_many(self, infos):
+        try:
+            if self.total is None:
+                self.total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM info_json").fetchone()[0]
+            added = False
+            for info in infos:
+                url = info.get("webpage_url") or info.get("original_url")
+                if not url or info.get("_type", "video") != "video" or not info.get("formats"):
+                    continue
+                now = time.time()
+                expires_at = info_expiry(info, now + self.ttl)
+                if expires_at - now < self.refresh_margin:
+                    continue
+                key = self.key(url)
+                data = zlib.compress(json.dumps(info, ensure_ascii=False).encode("utf-8"))
+                row = self.connection.execute("SELECT size FROM info_json WHERE key = ?", (key,)).fetchone()
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO info_json (key, expires_at, accessed_at, size, info) VALUES (?, ?, ?, ?, ?)",
+                    (key, expires_at, now, len(data), data)
+                )
+                self.total += len(data) - (row[0] if row else 0)
+                added = True
+            if not added:
+                return
+            if self.total > self.max_bytes:
+                self.evict()
+            self.connection.commit()
+        except sqlite3.Error:
+            self.connection.rollback()
+            self.total = None
+
+    def evict(self):
+        self.connection.execute("DELETE FROM info_json WHERE expires_at < ?", (time.time() + self.refresh_margin,))
+        total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM info_json").fetchone()[0]
+        if total > self.max_bytes:
+            for key, size in self.connection.execute("SELECT key, size FROM info_json ORDER BY accessed_at").fetchall():
+                if total <= self.max_bytes:
+                    break
+                self.connection.execute("DELETE FROM info_json WHERE key = ?", (key,))
+                total -= size
+        self.total = total
+
+def clone_file(source, target):
+    import fcntl
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), 0x40049409, src.fileno())  # FICLONE
+
+def place_file(source, target):
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    try:
+        os.link(source, target)
+        return "hardlink"
+    except OSError:
+        pass
+    import shutil
+    partial = target + ".part"
+    try:
+        try:
+            clone_file(source, partial)
+            method = "reflink"
+        except (ImportError, OSError):
+            shutil.copyfile(source, partial)
+            method = "copy"
+        shutil.copystat(source, partial)
+        os.replace(partial, target)
+    except OSError:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return method
+
+class OutputIndex:
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS output_index ("
+            "filepath TEXT PRIMARY KEY, extractor TEXT NOT NULL, video_id TEXT NOT NULL, "
+            "size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, added_at REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS output_index_video ON output_index (extractor, video_id)")
+        self.connection.commit()
+
+    def find(self, keys):
+        found = {}
+        stale = []
+        try:
+            for key in set(keys):
+                rows = self.connection.execute(
+                    "SELECT filepath, size, mtime_ns FROM output_index WHERE extractor = ? AND video_id = ?", key
+                ).fetchall()
+                for filepath, size, mtime_ns in rows:
+                    # A file that changed since it was indexed is no longer trusted.
+                    if file_signature(filepath) == f"{mtime_ns}:{size}":
+                        found[key] = filepath
+                        break
+                    stale.append((filepath,))
+            if stale:
+                self.connection.executemany("DELETE FROM output_index WHERE filepath = ?", stale)
+                self.connection.commit()
+        except sqlite3.Error:
+            pass
+        return found
+
+    def add(self, extractor, video_id, filepath):
+        try:
+            stat = os.stat(filepath)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO output_index (filepath, extractor, video_id, size, mtime_ns, added_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(filepath), extractor.lower(), video_id, stat.st_size, stat.st_mtime_ns, time.time())
+            )
+            self.connection.commit()
+        except (OSError, sqlite3.Error):
+            pass
+
+class JobJournal:
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS journal_jobs ("
+            "id INTEGER PRIMARY KEY, url TEXT NOT NULL, download_type TEXT NOT NULL, download_path TEXT NOT NULL, "
+            "cookie_file TEXT NOT NULL, state TEXT NOT NULL, listed INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS journal_entries ("
+            "job_id INTEGER NOT NULL, extractor TEXT NOT NULL, video_id TEXT NOT NULL, position INTEGER NOT NULL, "
+            "completed INTEGER NOT NULL DEFAULT 0, entry TEXT NOT NULL, PRIMARY KEY (job_id, extractor, video_id))"
+        )
+        self.connection.commit()
+
+    def add_job(self, job):
+        try:
+            cursor = self.connection.execute(
+                "INSERT INTO journal_jobs (url, download_type, download_path, cookie_file, state, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job.url, job.download_type, job.download_path, job.cookie_file or "", job.state, time.time())
+            )
+            self.connection.commit()
+            return cursor.lastrowid
+        except sqlite3.Error:
+            return None
+
+    def set_state(self, job_id, state):
+        try:
+            self.connection.execute("UPDATE journal_jobs SET state = ?, updated_at = ? WHERE id = ?", (state, time.time(), job_id))
+            self.connection.commit()
+        except sqlite3.Error:
+            pass
+
+    def set_entries(self, job_id, entries):
+        try:
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO journal_entries (job_id, extractor, video_id, position, entry) VALUES (?, ?, ?, ?, ?)",
+                    [(job_id, *archive_key(entry), position, json.dumps(compact_playlist_entry(entry), ensure_ascii=False))
+                     for position, entry in enumerate(entries)]
+                )
+                self.connection.execute("UPDATE journal_jobs SET listed = 1, updated_at = ? WHERE id = ?", (time.time(), job_id))
+        except sqlite3.Error:
+            pass
+
+    def complete_entry(self, job_id, extractor, video_id):
+        try:
+            self.connection.execute(
+                "UPDATE journal_entries SET completed = 1 WHERE job_id = ? AND extractor = ? AND video_id = ?",
+                (job_id, extractor.lower(), video_id)
+            )
+            self.connection.commit()
+        except sqlite3.Error:
+            pass
+
+    def remove(self, job_id):
+        try:
+            with self.connection:
+                self.connection.execute("DELETE FROM journal_entries WHERE job_id = ?", (job_id,))
+                self.connection.execute("DELETE FROM journal_jobs WHERE id = ?", (job_id,))
+        except sqlite3.Error:
+            pass
+
+    def unfinished(self):
+        records = []
+        try:
+            jobs = self.connection.execute(
+                "SELECT id, url, download_type, download_path, cookie_file, listed FROM journal_jobs WHERE state != 'completed' ORDER BY id"
+            ).fetchall()
+            for job_id, url, download_type, download_path, cookie_file, listed in jobs:
+                entries = None
+                if listed:
+                    entries = [json.loads(entry) for entry, in self.connection.execute(
+                        "SELECT entry FROM journal_entries WHERE job_id = ? AND completed = 0 ORDER BY position", (job_id,)
+                    )]
+                records.append({
+                    "id": job_id,
+                    "url": url,
+                    "download_type": download_type,
+                    "download_path": download_path,
+                    "cookie_file": cookie_file,
+                    "entries": entries,
+                })
+        except (sqlite3.Error, ValueError):
+            pass
+        return records
+
+    def clear(self):
+        try:
+            with self.connection:
+                self.connection.execute("DELETE FROM journal_entries")
+                self.connection.execute("DELETE FROM journal_jobs")
+        except sqlite3.Error:
+            pass
+
+postprocessor_stages = {
+    "Merger": "merge",
+    "ThumbnailsConvertor": "thumbnail_convert",
+    "EmbedThumbnail": "embed_thumbnail",
+    "Metadata": "embed_metadata",
+    "ModifyChapters": "embed_chapters",
+    "SponsorBlock": "sponsorblock",
+    "MoveFiles": "move",
+}
+
+class WatchList:
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS watched_sources ("
+            "url TEXT PRIMARY KEY, download_path TEXT NOT NULL, cookie_file TEXT NOT NULL, checked_at REAL NOT NULL, added_at REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS watch_seen ("
+            "url TEXT NOT NULL, extractor TEXT NOT NULL, video_id TEXT NOT NULL, seen_at REAL NOT NULL, "
+            "PRIMARY KEY (url, extractor, video_id))"
+        )
+        self.connection.commit()
+
+    def has(self, url):
+        try:
+            return self.connection.execute("SELECT 1 FROM watched_sources WHERE url = ?", (url,)).fetchone() is not None
+        except sqlite3.Error:
+            return False
+
+    def add(self, url, download_path, cookie_file):
+        try:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO watched_sources (url, download_path, cookie_file, checked_at, added_at) VALUES (?, ?, ?, 0, ?)",
+                (url, download_path, cookie_file or "", time.time())
+            )
+            self.connection.commit()
+        except sqlite3.Error:
+            pass
+
+    def remove(self, url):
+        try:
+            self.connection.execute("DELETE FROM watched_sources WHERE url = ?", (url,))
+            self.connection.execute("DELETE FROM watch_seen WHERE url = ?", (url,))
+            self.connection.commit()
+        except sqlite3.Error:
+            pass
+
+    def due(self, interval, now=None):
+        now = time.time() if now is None else now
+        try:
+            rows = self.connection.execute(
+                "SELECT url, download_path, cookie_file FROM watched_sources WHERE checked_at <= ? ORDER BY checked_at",
+                (now - interval,)
+            ).fetchall()
+        except sqlite3.Error:
+            return []
+        return [{"url": url, "download_path": download_path, "cookie_file": cookie_file} for url, download_path, cookie_file in rows]
+
+    def diff(self, url, entries):
+        try:
+            seen = set(self.connection.execute("SELECT extractor, video_id FROM watch_seen WHERE url = ?", (url,)))
+        except sqlite3.Error:
+            return [], False
+        new = []
+        # Listings are newest first, so everything past the first known entry is old.
+        for entry in entries:
+            if archive_key(entry) in seen:
+                break
+            new.append(entry)
+        return new, bool(seen)
+
+    def update(self, url, entries, keep, now=None):
+        now = time.time() if now is None else now
+        try:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO watch_seen (url, extractor, video_id, seen_at) VALUES (?, ?, ?, ?)",
+                [(url, *archive_key(entry), now) for entry in entries if entry.get("id")]
+            )
+            # Only the newest keys are needed to recognise the head of the listing.
+            self.connection.execute(
+                "DELETE FROM watch_seen WHERE url = ? AND rowid NOT IN "
+                "(SELECT rowid FROM watch_seen WHERE url = ? ORDER BY seen_at DESC LIMIT ?)",
+                (url, url, keep)
+            )
+            self.touch(url, now)
+        except sqlite3.Error:
+            pass
+
+    def touch(self, url, now=None):
+        try:
+            self.connection.execute("UPDATE watched_sources SET checked_at = ? WHERE url = ?", (time.time() if now is None else now, url))
+            self.connection.commit()
+        except sqlite3.Error:
+            pass
+
+class JobMetrics:
+    def __init__(self):
+        self.created_at = time.time()
+        self.created = time.monotonic()
+        self.launched = None
+        self.boundary = None
+        self.sleep_interval = 0.0
+        self.open_stages = {}
+        self.stages = []
+
+    def add(self, stage, seconds, video=None, **fields):
+        record = {"stage": stage, "seconds": round(max(seconds, 0.0), 3)}
+        if video is not None:
+            record["video"] = video
+        record.update(fields)
+        self.stages.append(record)
+
+    def begin(self, key, now=None, **fields):
+        self.open_stages.setdefault(key, (time.monotonic() if now is None else now, fields))
+
+    def end(self, key, stage, now=None, video=None, **fields):
+        started, begin_fields = self.open_stages.pop(key, (None, {}))
+        if started is None:
+            return None
+        now = time.monotonic() if now is None else now
+        self.add(stage, now - started, video, **dict(begin_fields, **fields))
+        return now - started
+
+    def launch(self, sleep_interval=0.0, now=None):
+        now = time.monotonic() if now is None else now
+        self.launched = now
+        self.sleep_interval = sleep_interval
+        self.add("wait", now - self.created)
+
+    def process_started(self, now=None):
+        self.boundary = time.monotonic() if now is None else now
+
+    def advance(self, now):
+        self.boundary = now if self.boundary is None else max(self.boundary, now)
+
+    def observe(self, event, now=None):
+        now = time.monotonic() if now is None else now
+        data = event.value
+        if event.kind == "video":
+            if self.boundary is not None:
+                gap = now - self.boundary
+                sleep = min(self.sleep_interval, gap)
+                if sleep > 0:
+                    self.add("sleep", sleep, data.get("id"))
+                self.add("extract", gap - sleep, data.get("id"))
+            self.advance(now)
+        elif event.kind == "progress":
+            key = ("download", data.get("id"), data.get("format_id"))
+            downloaded = number(data.get("downloaded_bytes")) or 0
+            self.begin(key, now, start_bytes=downloaded)
+            if data.get("status") == "finished":
+                started, fields = self.open_stages.pop(key)
+                seconds = now - started
+                size = max(downloaded - fields["start_bytes"], 0)
+                self.add("download", seconds, data.get("id"), format=data.get("format_id"), bytes=size, speed=round(size / seconds) if seconds > 0 else None)
+                self.advance(now)
+        elif event.kind == "postprocess":
+            name = data.get("postprocessor") or ""
+            key = ("postprocess", data.get("id"), name)
+            if data.get("status") == "started":
+                self.begin(key, now)
+            elif data.get("status") == "finished":
+                self.end(key, postprocessor_stages.get(name, name.lower()), now, data.get("id"))
+                self.advance(now)
+        elif event.kind == "finished":
+            self.advance(now)
+
+    def record(self, job, engine, version="", now=None):
+        now = time.monotonic() if now is None else now
+        totals = {}
+        for stage in self.stages:
+            totals[stage["stage"]] = round(totals.get(stage["stage"], 0.0) + stage["seconds"], 3)
+        downloads = [stage for stage in self.stages if stage["stage"] == "download"]
+        size = sum(stage["bytes"] for stage in downloads)
+        download_seconds = sum(stage["seconds"] for stage in downloads)
+        return {
+            "time": round(self.created_at, 3),
+            "url": job.url,
+            "type": job.download_type,
+            "domain": job.domain,
+            "state": job.state,
+            "engine": engine,
+            "version": version,
+            "concurrent_fragments": job.concurrent_fragments,
+            "videos": len({stage.get("video") for stage in downloads}),
+            "seconds": round(now - (self.launched or self.created), 3),
+            "bytes": size,
+            "speed": round(size / download_seconds) if download_seconds > 0 else None,
+            "totals": totals,
+            "stages": self.stages,
+        }
+
+class MetricsLog:
+    def __init__(self, path):
+        self.path = path
+
+    def append(self, record):
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError:
+            pass
+
+    def read(self):
+        records = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        pass
+        except OSError:
+            pass
+        return records
+
+OutputEvent = namedtuple("OutputEvent", "kind value")
+
+protocol_prefix = "FLUX "
+protocol_templates = {
+    "video": '{"event": "video", "id": %(id|null)j, "extractor": %(extractor_key|null)j, "title": %(title|null)j, "format_id": %(format_id|null)j}',
+    "download": (
+        '{"event": "progress", "id": %(info.id|null)j, "format_id": %(info.format_id|null)j, "status": %(progress.status|null)j, '
+        '"downloaded_bytes": %(progress.downloaded_bytes|null)s, "total_bytes": %(progress.total_bytes|null)s, '
+        '"total_bytes_estimate": %(progress.total_bytes_estimate|null)s, "speed": %(progress.speed|null)s, '
+        '"eta": %(progress.eta|null)s}'
+    ),
+    "postprocess": '{"event": "postprocess", "id": %(info.id|null)j, "postprocessor": %(progress.postprocessor|null)j, "status": %(progress.status|null)j}',
+    "after_move": '{"event": "finished", "id": %(id|null)j, "extractor": %(extractor_key|null)j, "filepath": %(filepath|null)j}',
+}
+
+def protocol_args():
+    return [
+        "--quiet", "--no-simulate", "--progress", "--newline",
+        "--print", "video:" + protocol_prefix + protocol_templates["video"],
+        "--progress-template", "download:" + protocol_prefix + protocol_templates["download"],
+        "--progress-template", "postprocess:" + protocol_prefix + protocol_templates["postprocess"],
+        "--print", "after_move:" + protocol_prefix + protocol_templates["after_move"],
+    ]
+
+def number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+class OutputParser:
+    line_separator = re.compile(rb"[\r\n]")
+
+    def __init__(self):
+        self.buffer = b""
+
+    def feed(self, data):
+        *lines, self.buffer = self.line_separator.split(self.buffer + data)
+        return [event for event in map(self.parse_line, lines) if event]
+
+    def flush(self):
+        line, self.buffer = self.buffer, b""
+        event = self.parse_line(line)
+        return [event] if event else []
+
+    def parse_line(self, raw):
+        line = raw.decode("utf-8", errors="ignore").strip()
+        if not line:
+            return None
+        if line.startswith(protocol_prefix):
+            try:
+                payload = json.loads(line[len(protocol_prefix):])
+                return OutputEvent(payload["event"], payload)
+            except (ValueError, KeyError, TypeError):
+                pass
+        return OutputEvent("message", line)
+
+class JobLog:
+    max_line_length = 2000
+
+    def __init__(self, capacity=2000, spill_path=None):
+        self.capacity = max(1, capacity)
+        self.lines = [None] * self.capacity
+        self.appended = 0
+        self.spill_path = spill_path
+        self.spill = None
+
+    def first(self):
+        return max(self.appended - self.capacity, 0)
+
+    def line(self, index):
+        return self.lines[index % self.capacity] if self.first() <= index < self.appended else ""
+
+    def tail(self, count):
+        return [self.line(index) for index in range(max(self.first(), self.appended - count), self.appended)]
+
+    def extend(self, lines):
+        lines = [line[:self.max_line_length] for line in lines]
+        first = self.first()
+        evicted = self.appended + len(lines) - self.capacity - first
+        if evicted > 0 and self.spill_path:
+            # Lines about to be overwritten go to disk instead of being lost.
+            kept = min(evicted, self.appended - first)
+            self.write_spill([self.line(index) for index in range(first, first + kept)] + lines[:evicted - kept])
+        if len(lines) > self.capacity:
+            self.appended += len(lines) - self.capacity
+            lines = lines[-self.capacity:]
+        for line in lines:
+            self.lines[self.appended % self.capacity] = line
+            self.appended += 1
+
+    def write_spill(self, lines):
+        try:
+            if self.spill is None:
+                import gzip
+                os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+                self.spill = gzip.open(self.spill_path, "at", encoding="utf-8")
+            self.spill.write("\n".join(lines) + "\n")
+        except OSError:
+            self.spill = None
+            self.spill_path = None
+
+    def close(self, keep=True):
+        if not self.spill_path:
+            return
+        if keep:
+            self.write_spill(self.tail(self.capacity))
+        if self.spill:
+            try:
+                self.spill.close()
+            except OSError:
+                pass
+            self.spill = None
+        if not keep and os.path.exists(self.spill_path):
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+        self.spill_path = None
+
+class LogModel(QAbstractListModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.log = None
+        self.first = 0
+        self.rows = 0
+
+    def set_log(self, log):
+        self.beginResetModel()
+        self.log = log
+        self.first = log.first() if log else 0
+        self.rows = log.appended - self.first if log else 0
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.rows
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and self.log and index.isValid():
+            return self.log.line(self.first + index.row())
+        return None
+
+    def refresh(self):
+        if self.log is None:
+            return False
+        first = self.log.first()
+        dropped = min(first - self.first, self.rows)
+        if dropped > 0:
+            self.beginRemoveRows(QModelIndex(), 0, dropped - 1)
+            self.first += dropped
+            self.rows -= dropped
+            self.endRemoveRows()
+        self.first = max(self.first, first)
+        added = self.log.appended - self.first - self.rows
+        if added > 0:
+            self.beginInsertRows(QModelIndex(), self.rows, self.rows + added - 1)
+            self.rows += added
+            self.endInsertRows()
+        return added > 0
+
+class VideoProgress:
+    __slots__ = ("stream_count", "streams", "postprocessed", "contribution")
+
+    def __init__(self):
+        self.stream_count = 1
+        self.streams = {}
+        self.postprocessed = 0
+        self.contribution = 0.0
+
+class ProgressTracker:
+    postprocessor_weight = 0.025
+    download_weight = 1.0 - 4 * postprocessor_weight
+    postprocessor_bits = {"Merger": 1, "ThumbnailsConvertor": 2, "EmbedThumbnail": 4, "Metadata": 8}
+    recent_size = 64
+
+    def __init__(self):
+        self.videos = {}
+        self.recent = deque(maxlen=self.recent_size)
+        self.completed = 0
+        self.total = 0.0
+        self.downloaded_bytes = 0
+
+    def video(self, key):
+        progress = self.videos.get(key)
+        if progress is None:
+            if key in self.recent:
+                return None
+            progress = self.videos[key] = VideoProgress()
+        return progress
+
+    def start_video(self, key, format_id):
+        progress = self.video(key)
+        if progress is None:
+            return
+        progress.stream_count = (format_id or "").count("+") + 1
+        self.refresh(progress)
+
+    def update_stream(self, key, format_id, status, downloaded, total):
+        progress = self.video(key)
+        if progress is None:
+            return
+        previous = progress.streams.get(format_id, (0.0, 0))
+        downloaded = int(downloaded or 0)
+        if status == "finished":
+            fraction = 1.0
+        elif total:
+            fraction = min(downloaded / total, 1.0)
+        else:
+            fraction = previous[0]
+        progress.streams[format_id] = (fraction, downloaded)
+        self.downloaded_bytes += max(downloaded - previous[1], 0)
+        self.refresh(progress)
+
+    def postprocessed(self, key, postprocessor):
+        bit = self.postprocessor_bits.get(postprocessor)
+        progress = self.video(key) if bit else None
+        if progress is not None:
+            progress.postprocessed |= bit
+            self.refresh(progress)
+
+    def finish(self, key):
+        if key in self.recent:
+            return
+        # Finished videos only live on in the running total.
+        progress = self.videos.pop(key, None)
+        self.total += 1.0 - (progress.contribution if progress else 0.0)
+        self.completed += 1
+        self.recent.append(key)
+
+    def refresh(self, progress):
+        streams = progress.streams
+        download = sum(fraction for fraction, _ in streams.values()) / max(progress.stream_count, len(streams), 1)
+        contribution = download * self.download_weight + bin(progress.postprocessed).count("1") * self.postprocessor_weight
+        self.total += contribution - progress.contribution
+        progress.contribution = contribution
+
+    def percentage(self, total_videos):
+        return min(self.total / max(total_videos, 1) * 99, 99)
+
+class PlaylistEnumerator(QObject):
+    entry_found = pyqtSignal(object)
+    completed = pyqtSignal(object, bool)
+
+    def __init__(self, url, yt_dlp_path, limit=0, parent=None):
+        super().__init__(parent)
+        self.url = url
+        self.yt_dlp_path = yt_dlp_path
+        self.limit = limit
+        self.entries = []
+        self.buffer = b""
+        self.process = QProcess(self)
+        self.process.readyReadStandardOutput.connect(self.read_output)
+        self.process.finished.connect(self.process_finished)
+
+    def start(self):
+        args = ["--flat-playlist", "--dump-json"]
+        if self.limit:
+            args.extend(["--playlist-items", f"1:{self.limit}"])
+        self.process.start(*yt_dlp_command(self.yt_dlp_path, args + [self.url]), QProcess.ReadOnly)
+        if not self.process.waitForStarted():
+            self.completed.emit(self.entries, False)
+            self.deleteLater()
+
+    def read_output(self):
+        self.buffer += bytes(self.process.readAllStandardOutput())
+        *lines, self.buffer = self.buffer.split(b"\n")
+        for line in lines:
+            self.parse_line(line)
+
+    def parse_line(self, line):
+        line = line.strip()
+        if not line:
+            return
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            return
+        self.entries.append(entry)
+        self.entry_found.emit(entry)
+
+    def process_finished(self, exit_code, exit_status):
+        self.read_output()
+        self.parse_line(self.buffer)
+        self.buffer = b""
+        self.completed.emit(self.entries, exit_status == QProcess.NormalExit and exit_code == 0)
+        self.deleteLater()
+
+    def stop(self):
+        if self.process.state() != QProcess.NotRunning:
+            self.process.finished.disconnect(self.process_finished)
+            self.process.kill()
+            self.process.waitForFinished(1000)
+        self.deleteLater()
+
+def metadata_args(urls, cookie_file=""):
+    args = ["--dump-json", "--no-playlist", "--ignore-errors", "--no-warnings", "-f", download_format, "--audio-multistreams"]
+    if cookie_file and os.path.exists(cookie_file):
+        args.extend(["--cookies", cookie_file])
+    return args + list(urls)
+
+class MetadataFetcher(QObject):
+    fetched = pyqtSignal(str, object)
+    completed = pyqtSignal()
+
+    def __init__(self, urls, yt_dlp_path, cookie_file="", parent=None):
+        super().__init__(parent)
+        self.urls = urls
+        self.yt_dlp_path = yt_dlp_path
+        self.cookie_file = cookie_file
+        self.buffer = b""
+        self.process = QProcess(self)
+        self.process.readyReadStandardOutput.connect(self.read_output)
+        self.process.finished.connect(self.process_finished)
+
+    def start(self):
+        self.process.start(*yt_dlp_command(self.yt_dlp_path, metadata_args(self.urls, self.cookie_file)), QProcess.ReadOnly)
+        if not self.process.waitForStarted():
+            self.completed.emit()
+            self.deleteLater()
+
+    def read_output(self):
+        self.buffer += bytes(self.process.readAllStandardOutput())
+        *lines, self.buffer = self.buffer.split(b"\n")
+        for line in lines:
+            self.parse_line(line)
+
+    def parse_line(self, line):
+        try:
+            info = json.loads(line)
+        except ValueError:
+            return
+        url = info.get("original_url") or info.get("webpage_url")
+        if url:
+            self.fetched.emit(url, info)
+
+    def process_finished(self, exit_code, exit_status):
+        self.read_output()
+        self.parse_line(self.buffer)
+        self.buffer = b""
+        self.completed.emit()
+        self.deleteLater()
+
+    def stop(self):
+        if self.process.state() != QProcess.NotRunning:
+            self.process.kill()
+            self.process.waitForFinished(1000)
+
+class EngineMetadataFetcher(QThread):
+    fetched = pyqtSignal(str, object)
+    completed = pyqtSignal()
+
+    def __init__(self, urls, cookie_file="", parent=None):
+        super().__init__(parent)
+        self.urls = urls
+        self.cookie_file = cookie_file
+        self.canceled = False
+        self.finished.connect(self.completed)
+        self.finished.connect(self.deleteLater)
+
+    def run(self):
+        yt_dlp = import_yt_dlp()
+        options = {
+            "quiet": True, "no_warnings": True, "noplaylist": True, "logger": EngineLogger(None),
+            "format": download_format, "allow_multiple_audio_streams": True,
+        }
+        if self.cookie_file and os.path.exists(self.cookie_file):
+            options["cookiefile"] = self.cookie_file
+        try:
+            with yt_dlp.YoutubeDL(options) as ydl:
+                for url in self.urls:
+                    if self.canceled:
+                        break
+                    try:
+                        info = ydl.extract_info(url, download=False)
+                    except Exception:
+                        continue
+                    if info:
+                        self.fetched.emit(url, ydl.sanitize_info(info))
+        except Exception:
+            pass
+
+    def stop(self):
+        self.canceled = True
+
+class EngineEnumerator(QThread):
+    entry_found = pyqtSignal(object)
+    completed = pyqtSignal(object, bool)
+
+    def __init__(self, url, cookie_file="", limit=0, parent=None):
+        super().__init__(parent)
+        self.url = url
+        self.cookie_file = cookie_file
+        self.limit = limit
+        self.entries = []
+        self.canceled = False
+        self.finished.connect(self.deleteLater)
+
+    def run(self):
+        yt_dlp = import_yt_dlp()
+        options = {"quiet": True, "no_warnings": True, "extract_flat": "in_playlist", "logger": EngineLogger(None)}
+        if self.cookie_file and os.path.exists(self.cookie_file):
+            options["cookiefile"] = self.cookie_file
+        ok = False
+        try:
+            with yt_dlp.YoutubeDL(options) as ydl:
+                info = ydl.extract_info(self.url, download=False, process=False)
+                for _ in range(5):
+                    if not info or info.get("_type") not in ("url", "url_transparent"):
+                        break
+                    info = ydl.extract_info(info["url"], download=False, process=False, ie_key=info.get("ie_key"))
+                info = info or {}
+                if info.get("_type") in ("playlist", "multi_video"):
+                    entries = info.get("entries") or ()
+                else:
+                    entries = [info] if info else ()
+                playlist_fields = {
+                    "playlist": info.get("title"),
+                    "playlist_id": info.get("id"),
+                    "playlist_title": info.get("title"),
+                    "extractor": info.get("extractor"),
+                    "extractor_key": info.get("extractor_key"),
+                }
+                for entry in entries:
+                    if self.canceled:
+                        break
+                    entry = dict(playlist_fields, **{key: value for key, value in entry.items() if value is not None})
+                    self.entries.append(entry)
+                    self.entry_found.emit(entry)
+                    if self.limit and len(self.entries) >= self.limit:
+                        # Entries are fetched lazily, so stopping here skips the remaining pages.
+                        break
+                ok = not self.canceled
+        except Exception:
+            pass
+        if not self.canceled:
+            self.completed.emit(self.entries, ok)
+
+    def stop(self):
+        self.canceled = True
+        for signal in (self.entry_found, self.completed):
+            try:
+                signal.disconnect()
+            except TypeError:
+                pass
+
+class ExternalDownload(QObject):
+    events = pyqtSignal(object)
+    completed = pyqtSignal(int)
+    live_tuning = False
+
+    def __init__(self, executable, args, parent=None):
+        super().__init__(parent)
+        self.executable = executable
+        self.args = args
+        self.parser = OutputParser()
+        self.process = QProcess(self)
+        self.process.setProcessChannelMode(QProcess.MergedChannels)
+        self.process.readyReadStandardOutput.connect(self.read_output)
+        self.process.readyReadStandardError.connect(self.read_error)
+        self.process.finished.connect(self.process_finished)
+
+    def start(self):
+        self.process.start(*yt_dlp_command(self.executable, self.args), QProcess.ReadWrite)
+        return self.process.waitForStarted()
+
+    def read_output(self):
+        events = self.parser.feed(bytes(self.process.readAllStandardOutput()))
+        if events:
+            self.events.emit(events)
+
+    def read_error(self):
+        error = str(self.process.readAllStandardError(), encoding='utf-8', errors='ignore')
+        self.events.emit([OutputEvent("error", error)])
+
+    def process_finished(self, exit_code, exit_status):
+        self.read_output()
+        events = self.parser.flush()
+        if events:
+            self.events.emit(events)
+        self.completed.emit(exit_code if exit_status == QProcess.NormalExit else -1)
+        self.deleteLater()
+
+    def stop(self):
+        if self.process.state() != QProcess.NotRunning:
+            self.process.terminate()
+            self.process.waitForFinished(1000)
+            if self.process.state() != QProcess.NotRunning:
+                self.process.kill()
+
+    def set_concurrent_fragments(self, fragments):
+        pass
+
+    def set_rate_limit(self, rate):
+        pass
+
+class EngineLogger:
+    def __init__(self, download):
+        self.download = download
+
+    def debug(self, message):
+        if self.download and not message.startswith("[debug] "):
+            self.download.emit_event("message", message)
+
+    def info(self, message):
+        self.debug(message)
+
+    def warning(self, message):
+        self.debug("WARNING: " + message)
+
+    def error(self, message):
+        self.debug(message)
+
+class RateLimiter:
+    burst_seconds = 1.0
+
+    def __init__(self, rate=0):
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.allowance = 0.0
+        self.updated = time.monotonic()
+        self.streams = {}
+
+    def consume(self, stream, downloaded, check_canceled=None):
+        if not isinstance(downloaded, (int, float)):
+            return
+        with self.lock:
+            previous = self.streams.get(stream, downloaded)
+            size = downloaded - previous
+            self.streams[stream] = max(previous, downloaded)
+            now = time.monotonic()
+            rate = self.rate
+            if not rate:
+                self.allowance = 0.0
+                self.updated = now
+                return
+            self.allowance = min(self.allowance + (now - self.updated) * rate, rate * self.burst_seconds) - max(size, 0)
+            self.updated = now
+            deadline = now - self.allowance / rate if self.allowance < 0 else now
+        while self.rate == rate:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if check_canceled:
+                check_canceled()
+            time.sleep(min(remaining, 0.25))
+
+    def release(self, stream):
+        with self.lock:
+            self.streams.pop(stream, None)
+
+engine_downloader = None
+
+def engine_downloader_class():
+    global engine_downloader
+    if engine_downloader is None:
+        yt_dlp = import_yt_dlp()
+
+        class EngineDownloader(yt_dlp.YoutubeDL):
+            def __init__(self, params, engine):
+                super().__init__(params)
+                self.engine = engine
+
+            def process_info(self, info_dict):
+                self.engine.check_canceled()
+                self.engine.emit_event("video", {
+                    "id": info_dict.get("id"),
+                    "extractor": info_dict.get("extractor_key"),
+                    "title": info_dict.get("title"),
+                    "format_id": info_dict.get("format_id"),
+                })
+                self.engine.emit_event("info", self.sanitize_info(info_dict))
+                if self.reuse_file(info_dict):
+                    return
+                return super().process_info(info_dict)
+
+            def reuse_file(self, info):
+                filepath = self.engine.reuse.get(((info.get("extractor_key") or "").lower(), str(info.get("id"))))
+                if not filepath:
+                    return False
+                target = os.path.splitext(self.prepare_filename(info))[0] + os.path.splitext(filepath)[1]
+                try:
+                    method = "existing" if os.path.exists(target) else place_file(filepath, target)
+                except OSError as e:
+                    self.engine.emit_event("message", f"WARNING: Could not reuse {filepath}: {e}")
+                    return False
+                self.engine.emit_event("message", f"[flux] Reused {filepath} ({method})")
+                self.engine.emit_event("finished", {
+                    "id": info.get("id"),
+                    "extractor": info.get("extractor_key"),
+                    "filepath": target,
+                })
+                info["filepath"] = target
+                return True
+
+            def post_process(self, filename, info, files_to_move=None):
+                if self.engine.pool is None:
+                    return self.run_post_process(filename, info, files_to_move)
+                self.engine.futures.append(self.engine.pool.submit(self.run_post_process, filename, dict(info), files_to_move))
+                info["filepath"] = filename
+                return info
+
+            def run_post_process(self, filename, info, files_to_move=None):
+                self.engine.check_canceled()
+                try:
+                    info = super().post_process(filename, info, files_to_move)
+                except yt_dlp.utils.PostProcessingError as e:
+                    self.engine.emit_event("message", f"ERROR: Postprocessing: {e}")
+                    raise
+                self.engine.emit_event("finished", {
+                    "id": info.get("id"),
+                    "extractor": info.get("extractor_key"),
+                    "filepath": info.get("filepath"),
+                })
+                return info
+
+        engine_downloader = EngineDownloader
+    return engine_downloader
+
+class EngineDownload(QThread):
+    events = pyqtSignal(object)
+    completed = pyqtSignal(int)
+    live_tuning = True
+
+    def __init__(self, args, pool=None, reuse=None, parent=None):
+        super().__init__(parent)
+        self.args = args
+        self.pool = pool
+        self.reuse = reuse or {}
+        self.futures = []
+        self.canceled = False
+        self.limiter = RateLimiter()
+        self.ydl = None
+        self.finished.connect(self.deleteLater)
+
+    def start(self):
+        super().start()
+        return True
+
+    def stop(self):
+        self.canceled = True
+        for future in self.futures:
+            future.cancel()
+
+    def finish_post_processing(self):
+        ok = True
+        for future in self.futures:
+            try:
+                future.result()
+            except Exception:
+                ok = False
+        return ok
+
+    def set_concurrent_fragments(self, fragments):
+        if self.ydl:
+            self.ydl.params["concurrent_fragment_downloads"] = fragments
+
+    def set_rate_limit(self, rate):
+        self.limiter.rate = rate
+
+    def emit_event(self, kind, value):
+        self.events.emit([OutputEvent(kind, value)])
+
+    def check_canceled(self):
+        if self.canceled:
+            raise import_yt_dlp().utils.DownloadCancelled("Download canceled")
+
+    def progress_hook(self, status):
+        self.check_canceled()
+        info = status.get("info_dict") or {}
+        stream = (info.get("id"), info.get("format_id"))
+        self.limiter.consume(stream, status.get("downloaded_bytes"), self.check_canceled)
+        if status.get("status") != "downloading":
+            self.limiter.release(stream)
+        self.emit_event("progress", {
+            "id": info.get("id"),
+            "format_id": info.get("format_id"),
+            "status": status.get("status"),
+            "downloaded_bytes": status.get("downloaded_bytes"),
+            "total_bytes": status.get("total_bytes"),
+            "total_bytes_estimate": status.get("total_bytes_estimate"),
+            "speed": status.get("speed"),
+            "eta": status.get("eta"),
+        })
+
+    def postprocessor_hook(self, status):
+        info = status.get("info_dict") or {}
+        self.emit_event("postprocess", {"id": info.get("id"), "postprocessor": status.get("postprocessor"), "status": status.get("status")})
+
+    def run(self):
+        yt_dlp = import_yt_dlp()
+        exit_code = 1
+        try:
+            parsed = yt_dlp.parse_options(self.args)
+            options = dict(
+                parsed.ydl_opts,
+                quiet=True,
+                noprogress=True,
+                logger=EngineLogger(self),
+                progress_hooks=[self.progress_hook],
+            )
+            with engine_downloader_class()(options, self) as ydl:
+                ydl.add_postprocessor_hook(self.postprocessor_hook)
+                self.ydl = ydl
+                try:
+                    if parsed.options.load_info_filename:
+                        exit_code = ydl.download_with_info_file(parsed.options.load_info_filename)
+                    else:
+                        exit_code = ydl.download(parsed.urls)
+                finally:
+                    if not self.finish_post_processing():
+                        exit_code = exit_code or 1
+        except yt_dlp.utils.YoutubeDLError:
+            pass
+        except Exception as e:
+            self.emit_event("message", f"ERROR: {e}")
+        self.completed.emit(exit_code)
+
+class DownloadJob:
+    def __init__(self, url, download_type, download_path, cookie_file):
+        self.url = url
+        self.download_type = download_type
+        self.download_path = download_path
+        self.cookie_file = cookie_file
+        self.domain = request_domain(url)
+        self.process = None
+        self.enumerator = None
+        self.source_url = url
+        self.info_file = None
+        self.info_dump = None
+        self.wait_for_listing = False
+        self.state = "queued"
+        self.title = ""
+        self.total_videos = 1
+        self.enumerated_videos = 0
+        self.tracker = ProgressTracker()
+        self.log = JobLog()
+        self.progress = 0.0
+        self.first_video_completed = False
+        self.was_canceled = False
+        self.concurrent_fragments = 1
+        self.rate_limit = 0
+        self.speeds = {}
+        self.reuse = {}
+        self.filesize = None
+        self.duration = None
+        self.journal_id = None
+        self.entries = None
+        self.metrics = JobMetrics()
+
+    def is_youtube(self):
+        return self.domain == "youtube.com"
+
+class DownloadQueue(QObject):
+    prefetch_batch_size = 10
+    job_added = pyqtSignal(object)
+    job_changed = pyqtSignal(object)
+    progress_changed = pyqtSignal(float)
+    status_changed = pyqtSignal(str, object)
+    queue_finished = pyqtSignal(int, bool)
+
+    def __init__(self, max_workers=3, playlist_cache=None, archive=None, pacer=None, tuner=None, engine="internal", postprocess_workers=2, journal=None, metrics=None, shaper=None, metadata=None, prefetch_workers=2, info_store=None, log_lines=2000, log_dir="", output_index=None, parent=None):
+        super().__init__(parent)
+        self.output_index = output_index
+        self.max_workers = max(1, max_workers)
+        self.log_lines = log_lines
+        self.log_dir = log_dir
+        self.log_sequence = 0
+        self.metadata = metadata
+        self.info_store = info_store
+        self.prefetch_workers = prefetch_workers
+        self.prefetch_pending = {}
+        self.prefetchers = []
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.timeout.connect(self.dispatch_prefetch)
+        self.shaper = shaper
+        self.bandwidth_timer = QTimer(self)
+        self.bandwidth_timer.setInterval(2000)
+        self.bandwidth_timer.timeout.connect(self.rebalance_bandwidth)
+        self.journal = journal
+        self.metrics = metrics
+        self.engine = engine
+        self.postprocess_workers = postprocess_workers
+        self.postprocess_pool = None
+        self.tuner = tuner
+        self.playlist_cache = playlist_cache
+        self.archive = archive
+        self.pacer = pacer
+        self.yt_dlp_path = None
+        self.yt_dlp_version = ""
+        self.ffmpeg_path = None
+        self.schedule_timer = QTimer(self)
+        self.schedule_timer.setSingleShot(True)
+        self.schedule_timer.timeout.connect(self.schedule)
+        self.jobs = []
+        self.progress_total = 0.0
+        self.pending = deque()
+        self.running = []
+        self.was_canceled = False
+
+    def is_active(self):
+        return bool(self.pending or self.running)
+
+    def executable(self):
+        if self.yt_dlp_path is None:
+            try:
+                self.yt_dlp_path = get_yt_dlp_path()
+            except FileNotFoundError:
+                return ""
+        return self.yt_dlp_path
+
+    def ffmpeg(self):
+        if self.ffmpeg_path is None:
+            self.ffmpeg_path = get_ffmpeg_path()
+        return self.ffmpeg_path
+
+    def set_binaries(self, binaries):
+        if binaries.yt_dlp_path:
+            self.yt_dlp_path = binaries.yt_dlp_path
+        self.yt_dlp_version = binaries.yt_dlp_version
+        self.ffmpeg_path = binaries.ffmpeg_path
+
+    def use_engine(self):
+        return self.engine == "internal" and import_yt_dlp() is not None
+
+    def enqueue(self, url, download_type, download_path, cookie_file, journal_id=None, entries=None):
+        if not self.is_active() or self.was_canceled:
+            # Jobs still winding down after a cancel belong to the batch that was canceled.
+            self.jobs = []
+            self.progress_total = 0.0
+            self.was_canceled = False
+        job = DownloadJob(url, download_type, download_path, cookie_file)
+        job.entries = entries
+        job.journal_id = journal_id
+        job.log = JobLog(self.log_lines, self.log_path())
+        if self.journal and journal_id is None:
+            job.journal_id = self.journal.add_job(job)
+        self.jobs.append(job)
+        self.pending.append(job)
+        cached = self.apply_metadata(job)
+        self.job_added.emit(job)
+        QTimer.singleShot(0, self.schedule)
+        if job.download_type == "single" and not cached:
+            self.prefetch(job)
+        return job
+
+    def log_path(self):
+        if not self.log_dir:
+            return None
+        self.log_sequence += 1
+        return os.path.join(self.log_dir, f"flux-{time.strftime('%Y%m%d-%H%M%S')}-{self.log_sequence}.log.gz")
+
+    def append_log(self, job, lines):
+        stamp = time.strftime("%H:%M:%S")
+        job.log.extend([f"{stamp} {line}" for line in lines])
+
+    def apply_metadata(self, job, metadata=None):
+        if metadata is None:
+            metadata = self.metadata.get(job.url) if self.metadata else None
+        if not metadata or job.download_type != "single":
+            return False
+        job.title = job.title or metadata.get("title") or ""
+        job.filesize = metadata.get("filesize")
+        job.duration = metadata.get("duration")
+        return True
+
+    def prefetch(self, job):
+        if self.prefetch_workers <= 0:
+            return
+        self.prefetch_pending[job.url] = job.cookie_file
+        if not self.prefetch_timer.isActive():
+            self.prefetch_timer.start(0)
+
+    def dispatch_prefetch(self):
+        while self.prefetch_pending and len(self.prefetchers) < self.prefetch_workers:
+            cookie_file = next(iter(self.prefetch_pending.values()))
+            urls = [url for url, cookies in self.prefetch_pending.items() if cookies == cookie_file][:self.prefetch_batch_size]
+            for url in urls:
+                del self.prefetch_pending[url]
+            if self.use_engine():
+                fetcher = EngineMetadataFetcher(urls, cookie_file, self)
+            else:
+                fetcher = MetadataFetcher(urls, self.executable(), cookie_file, self)
+            fetcher.fetched.connect(self.metadata_fetched)
+            fetcher.completed.connect(lambda fetcher=fetcher: self.prefetch_finished(fetcher))
+            self.prefetchers.append(fetcher)
+            fetcher.start()
+
+    def prefetch_finished(self, fetcher):
+        if fetcher in self.prefetchers:
+            self.prefetchers.remove(fetcher)
+            self.dispatch_prefetch()
+
+    def metadata_fetched(self, url, info):
+        metadata = compact_metadata(info)
+        if self.metadata:
+            self.metadata.put(url, metadata)
+        if self.info_store:
+            self.info_store.put(info)
+        for job in self.jobs:
+            if job.url == url and self.apply_metadata(job, metadata):
+                self.job_changed.emit(job)
+
+    def stop_prefetch(self):
+        self.prefetch_pending.clear()
+        for fetcher in self.prefetchers:
+            fetcher.stop()
+        self.prefetchers = []
+
+    def resume(self, record):
+        return self.enqueue(
+            record["url"], record["download_type"], record["download_path"], record["cookie_file"],
+            journal_id=record["id"], entries=record["entries"]
+        )
+
+    def record_state(self, job):
+        if self.journal and job.journal_id:
+            if job.state == "completed":
+                self.journal.remove(job.journal_id)
+            else:
+                self.journal.set_state(job.journal_id, job.state)
+
+    def schedule(self):
+        delay = None
+        for job in list(self.pending):
+            if len(self.running) >= self.max_workers:
+                break
+            wait = self.pacer.acquire(job.domain) if self.pacer else 0.0
+            if wait > 0:
+                delay = wait if delay is None else min(delay, wait)
+                continue
+            self.pending.remove(job)
+            self.launch(job)
+        if delay is not None and len(self.running) < self.max_workers and not self.schedule_timer.isActive():
+            self.schedule_timer.start(int(delay * 1000) + 1)
+
+    def start_enumeration(self, job):
+        job.metrics.begin("enumerate")
+        if self.use_engine():
+            job.enumerator = EngineEnumerator(job.url, job.cookie_file, parent=self)
+        else:
+            job.enumerator = PlaylistEnumerator(job.url, self.executable(), parent=self)
+        job.enumerator.entry_found.connect(lambda entry, job=job: self.entry_found(job, entry))
+        job.enumerator.completed.connect(lambda entries, ok, job=job: self.enumeration_finished(job, entries, ok))
+        job.enumerator.start()
+
+    def entry_found(self, job, entry):
+        job.enumerated_videos += 1
+        job.total_videos = max(job.enumerated_videos, 1)
+        self.job_changed.emit(job)
+
+    def enumeration_finished(self, job, entries, ok):
+        job.enumerator = None
+        job.metrics.end("enumerate", "enumerate", entries=len(entries))
+        job.total_videos = max(len(entries), 1)
+        if ok and entries and self.playlist_cache:
+            self.playlist_cache.put(job.source_url, entries)
+        if ok and entries and self.journal and job.journal_id:
+            self.journal.set_entries(job.journal_id, entries)
+        self.job_changed.emit(job)
+        if job.wait_for_listing:
+            job.wait_for_listing = False
+            if ok and entries:
+                self.dispatch_entries(job, entries)
+            else:
+                self.start_process(job)
+
+    def dispatch_entries(self, job, entries):
+        if self.journal and job.journal_id:
+            self.journal.set_entries(job.journal_id, entries)
+        if self.archive:
+            entries = self.archive.filter_new(job.source_url, entries)
+        job.enumerated_videos = len(entries)
+        job.total_videos = max(len(entries), 1)
+        if not entries:
+            self.finish_job(job, "completed")
+            return
+        self.find_reusable(job, [archive_key(entry) for entry in entries])
+        info = build_playlist_info(job.source_url, entries)
+        if self.info_store:
+            stored = self.info_store.get_many(entry_url(entry) for entry in info["entries"])
+            info["entries"] = [self.stored_entry(entry, stored.get(entry_url(entry))) for entry in info["entries"]]
+        self.write_info_file(job, info)
+        self.start_process(job)
+
+    def find_reusable(self, job, keys):
+        # Only the in-process engine can hand a video over to an existing file mid-run.
+        if self.output_index and self.use_engine():
+            job.reuse = self.output_index.find(keys)
+
+    def stored_entry(self, entry, info):
+        if not info:
+            return entry
+        # A resolved entry is downloaded as is instead of being extracted again.
+        return dict(info, _type="video", **{key: entry[key] for key in ("playlist", "playlist_id", "playlist_title") if key in entry})
+
+    def write_info_file(self, job, info):
+        import tempfile
+        try:
+            fd, job.info_file = tempfile.mkstemp(prefix="flux-", suffix=".json")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(info, f, ensure_ascii=False)
+        except OSError:
+            if job.info_file and os.path.exists(job.info_file):
+                os.remove(job.info_file)
+            job.info_file = None
+
+    def create_info_dump(self, job):
+        import tempfile
+        try:
+            fd, job.info_dump = tempfile.mkstemp(prefix="flux-", suffix=".jsonl")
+            os.close(fd)
+        except OSError:
+            job.info_dump = None
+
+    def store_info_dump(self, job):
+        if not job.info_dump or not self.info_store:
+            return
+        try:
+            with open(job.info_dump, "r", encoding="utf-8") as f:
+                self.info_store.put_many(read_info_lines(f))
+        except OSError:
+            pass
+
+    def remove_job_files(self, job):
+        for path in (job.info_file, job.info_dump):
+            if path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        job.info_file = None
+        job.info_dump = None
+
+    def build_download_args(self, job, protocol=True):
+        args = [
+            "-f", download_format,
+            "--audio-multistreams",
+            "--merge-output-format", "mkv",
+            "--embed-metadata",
+            "--embed-thumbnail",
+            "--convert-thumbnails", "png",
+            "--embed-chapters",
+            "--sponsorblock-mark", "all",
+            "--no-keep-fragments",
+            "--continue",
+            "--concurrent-fragments", str(job.concurrent_fragments),
+            "--retry-sleep", "http:exp=1:60",
+            "--retry-sleep", "fragment:exp=1:60",
+            "--retry-sleep", "extractor:exp=1:60",
+        ]
+
+        sleep_interval = self.pacer.sleep_interval(job.domain) if self.pacer else 0.0
+        if sleep_interval > 0:
+            args.extend(["--sleep-requests", f"{sleep_interval:g}", "--sleep-interval", f"{sleep_interval:g}"])
+
+        if job.cookie_file and os.path.exists(job.cookie_file):
+            args.extend(["--cookies", job.cookie_file])
+
+        if job.rate_limit and protocol:
+            # yt-dlp applies the limit to every fragment connection on its own.
+            args.extend(["--limit-rate", str(max(job.rate_limit // max(job.concurrent_fragments, 1), 1))])
+
+        if protocol:
+            args.extend(protocol_args())
+            if job.info_dump:
+                args.extend(["--print-to-file", "video:%()j", job.info_dump])
+        elif self.ffmpeg():
+            args.extend(["--ffmpeg-location", self.ffmpeg()])
+        if not job.info_file:
+            args.extend(["--no-playlist" if job.download_type == "single" else "--yes-playlist"])
+        output_template = os.path.join(job.download_path, "%(title)s.%(ext)s" if job.download_type == "single" else "%(playlist_title)s/%(title)s.%(ext)s")
+        args.extend(["-o", output_template, "--parse-metadata", "%(title)s:%(meta_title)s", "--parse-metadata", "%(playlist_title)s:%(meta_playlist_title)s"])
+        if job.info_file:
+            args.extend(["--no-clean-info-json", "--load-info-json", job.info_file])
+        else:
+            args.append(job.url)
+        return args
+
+    def launch(self, job):
+        self.prefetch_pending.pop(job.url, None)
+        job.state = "running"
+        job.total_videos = 1
+        if self.tuner:
+            job.concurrent_fragments = self.tuner.allocate(job)
+        job.metrics.launch(self.pacer.sleep_interval(job.domain) if self.pacer else 0.0)
+        self.running.append(job)
+        self.job_changed.emit(job)
+        self.record_state(job)
+        if job.download_type == "playlist":
+            job.source_url = canonical_playlist_url(job.url)
+            if job.entries is not None:
+                self.dispatch_entries(job, job.entries)
+                return
+            entries = self.playlist_cache.get(job.source_url) if self.playlist_cache else None
+            if entries:
+                self.dispatch_entries(job, entries)
+                return
+            job.wait_for_listing = bool(self.archive and self.archive.has_scope(job.source_url))
+            self.start_enumeration(job)
+            if job.wait_for_listing:
+                return
+        elif self.output_index:
+            info = self.info_store.get(job.url) if self.info_store else None
+            self.find_reusable(job, [canonical_url(job.url, "single")[0]] + ([archive_key(info)] if info else []))
+        self.start_process(job)
+
+    def start_process(self, job):
+        self.rebalance_bandwidth(job)
+        if job.download_type == "single" and not job.info_file and self.info_store:
+            info = self.info_store.get(job.url)
+            if info:
+                self.write_info_file(job, info)
+        if self.use_engine():
+            if self.postprocess_pool is None and self.postprocess_workers > 0:
+                from concurrent.futures import ThreadPoolExecutor
+                self.postprocess_pool = ThreadPoolExecutor(self.postprocess_workers, thread_name_prefix="flux-postprocess")
+            job.process = EngineDownload(self.build_download_args(job, protocol=False), self.postprocess_pool, job.reuse, self)
+        else:
+            if self.info_store:
+                self.create_info_dump(job)
+            job.process = ExternalDownload(self.executable(), self.build_download_args(job), self)
+        job.process.set_rate_limit(job.rate_limit)
+        job.process.events.connect(lambda events, job=job: self.handle_events(job, events))
+        job.process.completed.connect(lambda exit_code, job=job: self.process_finished(job, exit_code))
+        if not job.process.start():
+            job.process.deleteLater()
+            job.process = None
+            self.status_changed.emit("yt_dlp_error", {})
+            self.finish_job(job, "failed")
+            return
+        job.metrics.process_started()
+
+    def stop_enumeration(self, job):
+        if job.enumerator:
+            job.enumerator.stop()
+            job.enumerator = None
+
+    def stop_process(self, job):
+        if job.process:
+            job.process.stop()
+
+    def handle_events(self, job, events):
+        lines = []
+        for event in events:
+            self.handle_event(job, event)
+            if event.kind in ("message", "error"):
+                lines.extend(line for line in str(event.value).splitlines() if line.strip())
+        if lines:
+            self.append_log(job, lines)
+        self.set_job_progress(job, job.tracker.percentage(job.total_videos))
+
+    def handle_event(self, job, event):
+        job.metrics.observe(event)
+        data = event.value
+        if event.kind == "video":
+            job.title = data.get("title") or job.title
+            self.status_changed.emit("", {"text": job.title})
+            job.tracker.start_video(data.get("id"), data.get("format_id"))
+            if job.download_type == "single":
+                job.total_videos = 1
+        elif event.kind == "progress":
+            job.tracker.update_stream(
+                data.get("id"),
+                data.get("format_id"),
+                data.get("status"),
+                number(data.get("downloaded_bytes")),
+                number(data.get("total_bytes")) or number(data.get("total_bytes_estimate"))
+            )
+            stream = (data.get("id"), data.get("format_id"))
+            if data.get("status") == "downloading" and number(data.get("speed")):
+                job.speeds[stream] = data["speed"]
+            else:
+                job.speeds.pop(stream, None)
+            if self.tuner and job.process and job.process.live_tuning:
+                fragments = self.tuner.observe(job, (data.get("id"), data.get("format_id")), data.get("status"), number(data.get("downloaded_bytes")))
+                if fragments:
+                    job.concurrent_fragments = fragments
+                    job.process.set_concurrent_fragments(fragments)
+        elif event.kind == "postprocess":
+            if data.get("status") == "finished":
+                job.tracker.postprocessed(data.get("id"), data.get("postprocessor"))
+        elif event.kind == "finished":
+            job.tracker.finish(data.get("id"))
+            if self.pacer:
+                self.pacer.reward(job.domain)
+            if job.download_type == "playlist" and self.archive and data.get("id"):
+                self.archive.add(job.source_url, data.get("extractor") or "", str(data["id"]))
+            if self.journal and job.journal_id and data.get("id"):
+                self.journal.complete_entry(job.journal_id, data.get("extractor") or "", str(data["id"]))
+            if self.output_index and data.get("id") and data.get("filepath"):
+                self.output_index.add(data.get("extractor") or "", str(data["id"]), data["filepath"])
+            if job.download_type == "single":
+                job.first_video_completed = True
+        elif event.kind == "info":
+            if self.info_store:
+                self.info_store.put(data)
+        elif event.kind == "message":
+            self.check_rate_limit(job, data)
+        elif event.kind == "error":
+            self.handle_error(job, data)
+
+    def check_rate_limit(self, job, text):
+        if self.pacer and ("HTTP Error 429" in text or "Too Many Requests" in text):
+            if self.pacer.penalize(job.domain):
+                self.status_changed.emit("rate_limited", {"domain": job.domain})
+
+    def set_job_progress(self, job, value):
+        if not job.was_canceled or job in self.jobs:
+            self.progress_total += value - job.progress
+        job.progress = value
+        self.job_changed.emit(job)
+        if self.jobs:
+            self.progress_changed.emit(self.progress_total / len(self.jobs))
+
+    def handle_error(self, job, error):
+        self.check_rate_limit(job, error)
+        if error.strip() and not job.was_canceled:
+            if job.is_youtube() and "ERROR" in error.upper():
+                self.status_changed.emit("youtube_cookie_error", {})
+            elif "WARNING" in error:
+                if "unavailable videos are hidden" in error:
+                    count = error.split("INFO - ")[1].split(" ")[0]
+                    self.status_changed.emit("unavailable_videos", {"count": count})
+                else:
+                    self.status_changed.emit("warning", {"message": error.strip()})
+            else:
+                self.status_changed.emit("download_error", {"error": error.strip()})
+
+    def process_finished(self, job, exit_code):
+        if job.was_canceled:
+            state = "canceled"
+        elif exit_code == 0 or (job.download_type == "single" and job.first_video_completed):
+            state = "completed"
+        else:
+            state = "failed"
+            if job.is_youtube():
+                self.status_changed.emit("youtube_cookie_error", {})
+            else:
+                self.status_changed.emit("download_error", {"error": "Unknown error"})
+        job.process = None
+        self.append_log(job, [f"yt-dlp exited with code {exit_code}"])
+        self.store_info_dump(job)
+        self.finish_job(job, state)
+
+    def rebalance_bandwidth(self, starting=None):
+        if not self.shaper:
+            return
+        if not self.running:
+            self.bandwidth_timer.stop()
+            return
+        for job, rate in self.shaper.allocate(self.running, starting, min(self.max_workers, len(self.running) + len(self.pending))).items():
+            job.rate_limit = rate
+            if job.process:
+                job.process.set_rate_limit(rate)
+        if not self.bandwidth_timer.isActive():
+            self.bandwidth_timer.start()
+
+    def finish_job(self, job, state):
+        if job in self.running:
+            self.running.remove(job)
+            job.speeds.clear()
+            self.rebalance_bandwidth()
+        if self.tuner:
+            self.tuner.release(job)
+        job.state = state
+        self.record_state(job)
+        job.log.close(keep=state != "completed")
+        if self.metrics:
+            if self.use_engine():
+                self.metrics.append(job.metrics.record(job, "internal", import_yt_dlp().version.__version__))
+            else:
+                self.metrics.append(job.metrics.record(job, "external", self.yt_dlp_version))
+        self.stop_enumeration(job)
+        self.remove_job_files(job)
+        self.set_job_progress(job, 99 if state == "completed" else job.progress)
+        QTimer.singleShot(0, self.schedule)
+        self.check_finished()
+
+    def check_finished(self):
+        if not self.is_active():
+            failed = sum(1 for job in self.jobs if job.state == "failed")
+            self.queue_finished.emit(failed, self.was_canceled)
+
+    def cancel_all(self):
+        self.was_canceled = True
+        self.stop_prefetch()
+        canceled_pending = bool(self.pending)
+        while self.pending:
+            job = self.pending.popleft()
+            job.was_canceled = True
+            job.state = "canceled"
+            self.job_changed.emit(job)
+        running = list(self.running)
+        for job in running:
+            job.was_canceled = True
+            if job.process:
+                self.stop_process(job)
+            else:
+                self.finish_job(job, "canceled")
+        if canceled_pending and not running:
+            # Only waiting jobs were canceled, so no finish_job reports the end of the batch.
+            self.check_finished()
+
+    def shutdown(self, timeout=3000):
+        self.cancel_all()
+        for thread in self.findChildren(QThread):
+            thread.wait(timeout)
+        if self.postprocess_pool:
+            self.postprocess_pool.shutdown(wait=False)
+
+class SourceWatcher(QObject):
+    found = pyqtSignal(object, object)
+    poll_interval = 60000
+
+    def __init__(self, watchlist, queue, interval=3600, head_size=30, max_head_size=480, workers=2, parent=None):
+        super().__init__(parent)
+        self.watchlist = watchlist
+        self.queue = queue
+        self.interval = max(interval, self.poll_interval // 1000)
+        self.head_size = max(1, head_size)
+        self.max_head_size = max(self.head_size, max_head_size)
+        self.workers = max(1, workers)
+        self.checking = {}
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.poll_interval)
+        self.timer.timeout.connect(self.poll)
+        self.retry_timer = QTimer(self)
+        self.retry_timer.setSingleShot(True)
+        self.retry_timer.timeout.connect(self.poll)
+
+    def start(self):
+        self.timer.start()
+        QTimer.singleShot(0, self.poll)
+
+    def poll(self):
+        for source in self.watchlist.due(self.interval):
+            if len(self.checking) >= self.workers:
+                break
+            if source["url"] in self.checking:
+                continue
+            wait = self.queue.pacer.acquire(request_domain(source["url"])) if self.queue.pacer else 0.0
+            if wait > 0:
+                if not self.retry_timer.isActive():
+                    self.retry_timer.start(int(wait * 1000) + 1)
+                continue
+            self.check(source, self.head_size)
+
+    def check(self, source, limit):
+        if self.queue.use_engine():
+            enumerator = EngineEnumerator(source["url"], source["cookie_file"], limit, parent=self)
+        else:
+            enumerator = PlaylistEnumerator(source["url"], self.queue.executable(), limit, parent=self)
+        self.checking[source["url"]] = enumerator
+        enumerator.completed.connect(lambda entries, ok, source=source, limit=limit: self.check_finished(source, limit, entries, ok))
+        enumerator.start()
+
+    def check_finished(self, source, limit, entries, ok):
+        url = source["url"]
+        self.checking.pop(url, None)
+        entries = [entry for entry in entries if entry.get("id")]
+        if not ok or not entries:
+            self.watchlist.touch(url)
+        else:
+            new, known = self.watchlist.diff(url, entries)
+            if known and len(new) == len(entries) and len(entries) >= limit and limit < self.max_head_size:
+                # Nothing in the head was seen before, so more may have been published since the last check.
+                self.check(source, min(limit * 2, self.max_head_size))
+                return
+            self.watchlist.update(url, entries, 4 * self.max_head_size)
+            # The first check only records where the listing stands.
+            if known and new:
+                self.found.emit(source, new)
+        QTimer.singleShot(0, self.poll)
+
+    def stop(self, timeout=3000):
+        self.timer.stop()
+        self.retry_timer.stop()
+        for enumerator in list(self.checking.values()):
+            enumerator.stop()
+            if isinstance(enumerator, QThread):
+                enumerator.wait(timeout)
+        self.checking = {}
+
+class HeadlessRunner(QObject):
+    log_tail = 20
+
+    def __init__(self, queue, language="en", stream=None, parent=None):
+        super().__init__(parent)
+        self.queue = queue
+        self.language = language
+        self.stream = stream or sys.stdout
+        self.states = {}
+        self.last_progress = None
+        self.exit_code = 0
+        queue.job_changed.connect(self.job_changed)
+        queue.progress_changed.connect(self.progress_changed)
+        queue.status_changed.connect(self.status_changed)
+        queue.queue_finished.connect(self.queue_finished)
+
+    def emit(self, **record):
+        record["time"] = round(time.time(), 3)
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+    def job_changed(self, job):
+        if self.states.get(job) != job.state:
+            self.states[job] = job.state
+            if job.state == "failed":
+                self.emit(event="job", url=job.url, state=job.state, title=job.title, videos=job.total_videos, log=job.log.tail(self.log_tail))
+            else:
+                self.emit(event="job", url=job.url, state=job.state, title=job.title, videos=job.total_videos)
+
+    def progress_changed(self, value):
+        if int(value) != self.last_progress:
+            self.last_progress = int(value)
+            self.emit(event="progress", percent=self.last_progress)
+
+    def status_changed(self, key, kwargs):
+        message = translations[self.language][key].format(**kwargs) if key else kwargs.get("text", "")
+        self.emit(event="status", key=key, message=message)
+
+    def queue_finished(self, failed, canceled):
+        self.exit_code = 130 if canceled else (1 if failed else 0)
+        self.emit(event="done", jobs=len(self.queue.jobs), failed=failed, canceled=canceled)
+        QCoreApplication.exit(self.exit_code)
+
+def instance_name():
+    user = os.environ.get("USER") or os.environ.get("USERNAME") or ""
+    # One instance per user and working directory, since settings.ini and flux.db live there.
+    return f"flux-{zlib.crc32((user + os.path.abspath('.')).encode('utf-8')):08x}"
+
+def lock_instance():
+    import tempfile
+    from PyQt5.QtCore import QLockFile
+    lock = QLockFile(os.path.join(tempfile.gettempdir(), instance_name() + ".lock"))
+    # Only a lock whose owner process is gone counts as stale, however long the instance runs.
+    lock.setStaleLockTime(0)
+    return lock if lock.tryLock(0) else None
+
+def send_to_instance(message, timeout=10000):
+    from PyQt5.QtNetwork import QLocalSocket
+    socket = QLocalSocket()
+    deadline = time.monotonic() + timeout / 1000
+    # The instance holding the lock may still be starting up, so keep trying until it listens.
+    while True:
+        socket.connectToServer(instance_name())
+        if socket.waitForConnected(1000):
+            break
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.1)
+    socket.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+    socket.waitForBytesWritten(timeout)
+    socket.waitForReadyRead(timeout)
+    socket.disconnectFromServer()
+    return True
+
+class InstanceServer(QObject):
+    received = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        from PyQt5.QtNetwork import QLocalServer
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self.accept)
+
+    def listen(self):
+        from PyQt5.QtNetwork import QLocalServer
+        name = instance_name()
+        if self.server.listen(name):
+            return True
+        # This process holds the instance lock, so the name was left behind by a crashed instance.
+        QLocalServer.removeServer(name)
+        return self.server.listen(name)
+
+    def accept(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            socket.readyRead.connect(lambda socket=socket: self.read(socket))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def read(self, socket):
+        while socket.canReadLine():
+            try:
+                message = json.loads(bytes(socket.readLine()).decode("utf-8"))
+            except ValueError:
+                socket.write(b"error\n")
+                continue
+            socket.write(b"ok\n")
+            if isinstance(message, dict):
+                self.received.emit(message)
+
+def parse_launch_args(argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog="Flux", description="Download videos and playlists with yt-dlp.")
+    parser.add_argument("urls", nargs="*", help="URLs to queue; handed to the running Flux window if there is one")
+    parser.add_argument("--type", choices=("auto", "single", "playlist"), default="auto", help="download type for every URL (default: detect per URL)")
+    parser.add_argument("--output", metavar="DIR", help="download folder (default: the one chosen in the window)")
+    parser.add_argument("--profile", metavar="FILE", help="write cProfile statistics of the session to FILE")
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+def run_profiled(path, func):
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func)
+    finally:
+        profiler.dump_stats(path)
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+
+def format_seconds(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+def run_stats(argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog="Flux", description="Summarize the per-job metrics of earlier downloads.")
+    parser.add_argument("--stats", metavar="FILE", nargs="?", const="flux-metrics.jsonl", required=True, help="metrics file (default: flux-metrics.jsonl)")
+    parser.add_argument("--last", type=int, metavar="N", help="only summarize the last N jobs")
+    args = parser.parse_args(argv)
+
+    records = MetricsLog(args.stats).read()
+    if args.last:
+        records = records[-args.last:]
+    if not records:
+        print(f"Flux: no metrics in {args.stats}", file=sys.stderr)
+        return 1
+
+    states = {}
+    stages = {}
+    domains = {}
+    for record in records:
+        states[record.get("state")] = states.get(record.get("state"), 0) + 1
+        for stage in record.get("stages", []):
+            total = stages.setdefault(stage["stage"], [0.0, 0])
+            total[0] += stage["seconds"]
+            total[1] += 1
+        domain = domains.setdefault(record.get("domain") or "", [0, 0, 0.0])
+        domain[0] += 1
+        domain[1] += record.get("bytes") or 0
+        domain[2] += record.get("totals", {}).get("download", 0.0)
+
+    size = sum(domain[1] for domain in domains.values())
+    download_seconds = sum(domain[2] for domain in domains.values())
+    print(f"Jobs: {len(records)} ({', '.join(f'{count} {state}' for state, count in sorted(states.items()))})")
+    print(f"Videos: {sum(record.get('videos', 0) for record in records)}, {format_bytes(size)} in {format_seconds(sum(record.get('seconds', 0.0) for record in records))}")
+    if download_seconds > 0:
+        print(f"Average download speed: {format_bytes(size / download_seconds)}/s")
+    print()
+    stage_seconds = sum(total for total, _ in stages.values()) or 1.0
+    print(f"{'Stage':<18}{'Total':>12}{'Share':>8}{'Count':>8}{'Mean':>10}")
+    for stage, (total, count) in sorted(stages.items(), key=lambda item: -item[1][0]):
+        print(f"{stage:<18}{format_seconds(total):>12}{total / stage_seconds:>8.1%}{count:>8}{total / count:>9.2f}s")
+    print()
+    print(f"{'Domain':<24}{'Jobs':>6}{'Downloaded':>14}{'Speed':>14}")
+    for name, (jobs, size, seconds) in sorted(domains.items(), key=lambda item: -item[1][1]):
+        speed = f"{format_bytes(size / seconds)}/s" if seconds > 0 else "-"
+        print(f"{name or '-':<24}{jobs:>6}{format_bytes(size):>14}{speed:>14}")
+    return 0
+
+settings_defaults = {
+    "language": "en",
+    "cookie_file": "",
+    "download_path": os.path.expanduser("~/Downloads"),
+    "window_width": 900,
+    "window_height": 800,
+    "window_x": 100,
+    "window_y": 100,
+    "max_concurrent_downloads": 3,
+    "progress_refresh_hz": 15,
+    "playlist_cache_ttl": 21600,
+    "playlist_cache_size_mb": 64,
+    "engine": "internal",
+    "concurrent_fragments": "auto",
+    "connection_budget": 16,
+    "postprocess_workers": 2,
+    "metrics_file": "flux-metrics.jsonl",
+    "bandwidth_limit": "0",
+    "bandwidth_schedule": "",
+    "metadata_cache_ttl": 86400,
+    "metadata_workers": 2,
+    "info_json_ttl": 1800,
+    "info_store_size_mb": 256,
+    "log_lines": 2000,
+    "log_dir": "",
+    "reuse_downloads": True,
+    "watch_interval": 3600,
+    "watch_head_size": 30,
+    "watch_workers": 2,
+}
+
+def load_config(path="settings.ini"):
+    config = configparser.ConfigParser()
+    try:
+        if os.path.exists(path):
+            config.read(path, encoding="utf-8")
+    except (configparser.Error, OSError, UnicodeDecodeError):
+        pass
+    settings = {}
+    for key, default in settings_defaults.items():
+        try:
+            if isinstance(default, bool):
+                settings[key] = config.getboolean("Settings", key, fallback=default)
+            elif isinstance(default, int):
+                settings[key] = config.getint("Settings", key, fallback=default)
+            else:
+                settings[key] = config.get("Settings", key, fallback=default)
+        except (ValueError, configparser.Error):
+            settings[key] = default
+    if settings["language"] not in translations:
+        settings["language"] = settings_defaults["language"]
+    if settings["engine"] not in engine_modes:
+        settings["engine"] = settings_defaults["engine"]
+    settings["concurrent_fragments"] = read_concurrent_fragments(settings["concurrent_fragments"])
+    settings["request_rates"] = read_request_rates(config)
+    return config, settings
+
+def open_store(store_class, *args):
+    try:
+        return store_class(*args)
+    except sqlite3.Error:
+        return None
+
+def build_queue(settings, database_file="flux.db", parent=None):
+    rates = dict(settings["request_rates"])
+    shaper = BandwidthShaper(read_rate(settings["bandwidth_limit"]), read_bandwidth_schedule(settings["bandwidth_schedule"]))
+    return DownloadQueue(
+        max_workers=settings["max_concurrent_downloads"],
+        playlist_cache=open_store(PlaylistCache, database_file, settings["playlist_cache_ttl"], settings["playlist_cache_size_mb"] * 1024 * 1024),
+        archive=open_store(DownloadArchive, database_file),
+        pacer=RequestPacer(rates, rates.pop("default", 0.0)),
+        tuner=FragmentTuner(settings["concurrent_fragments"], settings["connection_budget"]),
+        engine=settings["engine"],
+        postprocess_workers=settings["postprocess_workers"],
+        journal=open_store(JobJournal, database_file),
+        metrics=MetricsLog(settings["metrics_file"]) if settings["metrics_file"] else None,
+        shaper=shaper if shaper.limit or shaper.schedule else None,
+        metadata=open_store(MetadataCache, database_file, settings["metadata_cache_ttl"]),
+        prefetch_workers=settings["metadata_workers"],
+        info_store=open_store(InfoStore, database_file, settings["info_json_ttl"], settings["info_store_size_mb"] * 1024 * 1024),
+        log_lines=settings["log_lines"],
+        log_dir=settings["log_dir"],
+        output_index=open_store(OutputIndex, database_file) if settings["reuse_downloads"] else None,
+        parent=parent
+    )
+
+def run_headless(argv):
+    import argparse
+    import signal
+    parser = argparse.ArgumentParser(prog="Flux", description="Download a list of URLs without the GUI.")
+    parser.add_argument("--headless", metavar="FILE", required=True, help="text file with one URL per line, or - to read standard input")
+    parser.add_argument("--type", choices=("auto", "single", "playlist"), default="auto", help="download type for every URL (default: detect per URL)")
+    parser.add_argument("--output", metavar="DIR", help="download folder (default: download_path from settings.ini)")
+    parser.add_argument("--cookies", metavar="FILE", help="cookie file (default: cookie_file from settings.ini)")
+    parser.add_argument("--jobs", type=int, help="number of concurrent downloads")
+    parser.add_argument("--settings", default="settings.ini", help="settings file to read defaults from")
+    parser.add_argument("--limit-rate", metavar="RATE", help="overall bandwidth cap such as 5M, 0 for none (default: bandwidth_limit from settings.ini)")
+    parser.add_argument("--resume", action="store_true", help="also continue downloads left unfinished by an earlier run")
+    parser.add_argument("--profile", metavar="FILE", help="write cProfile statistics of the run to FILE")
+    args = parser.parse_args(argv)
+
+    config, settings = load_config(args.settings)
+    download_path = args.output or settings["download_path"]
+    cookie_file = args.cookies if args.cookies is not None else settings["cookie_file"]
+    if args.jobs:
+        settings["max_concurrent_downloads"] = args.jobs
+    if args.limit_rate is not None:
+        settings["bandwidth_limit"] = args.limit_rate
+
+    try:
+        if args.headless == "-":
+            urls = read_url_list(sys.stdin, None if args.type == "auto" else args.type)
+        else:
+            with open(args.headless, "r", encoding="utf-8") as f:
+                urls = read_url_list(f, None if args.type == "auto" else args.type)
+    except OSError as e:
+        print(f"Flux: cannot read {args.headless}: {e}", file=sys.stderr)
+        return 2
+    if urls and not os.path.isdir(download_path):
+        print(translations["en"]["invalid_path"], file=sys.stderr)
+        return 2
+
+    app = QCoreApplication(sys.argv[:1])
+    queue = build_queue(settings, parent=app)
+    records = queue.journal.unfinished() if args.resume and queue.journal else []
+    if not urls and not records:
+        print(translations["en"]["no_url"], file=sys.stderr)
+        return 2
+
+    if not queue.use_engine():
+        queue.set_binaries(discover_binaries(config["Binaries"] if config.has_section("Binaries") else None))
+    runner = HeadlessRunner(queue, settings["language"], parent=app)
+
+    signal.signal(signal.SIGINT, lambda signum, frame: queue.cancel_all())
+    signal_timer = QTimer(app)
+    signal_timer.timeout.connect(lambda: None)
+    signal_timer.start(200)
+
+    def enqueue_all():
+        for record in records:
+            queue.resume(record)
+        for url in urls:
+            queue.enqueue(url, detect_download_type(url) if args.type == "auto" else args.type, download_path, cookie_file)
+
+    QTimer.singleShot(0, enqueue_all)
+    if args.profile:
+        run_profiled(args.profile, app.exec_)
+    else:
+        app.exec_()
+    queue.shutdown()
+    return runner.exit_code
+
 class FluxWindow(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.config = configparser.ConfigParser()
         self.config_file = "settings.ini"
-        self.language = "en"
-        self.cookie_file = ""
-        self.download_path = os.path.expanduser("~/Downloads")
-        self.window_width = 900
-        self.window_height = 800
-        self.window_x = 100
-        self.window_y = 100
-        self.completed_videos = 0
-        self.current_video_index = 0
+        self.database_file = "flux.db"
+        self.config, settings = load_config(self.config_file)
+        for key, value in settings.items():
+            setattr(self, key, value)
+        self.binaries = None
+        self.first_painted = False
         self.total_progress = 0.0
-        self.was_canceled = False
         self.current_status = ""
         self.current_status_key = ""
-        try:
-            if os.path.exists(self.config_file):
-                self.config.read(self.config_file, encoding="utf-8")
-                self.language = self.config.get("Settings", "language", fallback="en")
-                self.cookie_file = self.config.get("Settings", "cookie_file", fallback="")
-                self.download_path = self.config.get("Settings", "download_path", fallback=os.path.expanduser("~/Downloads"))
-                self.window_width = self.config.getint("Settings", "window_width", fallback=900)
-                self.window_height = self.config.getint("Settings", "window_height", fallback=800)
-                self.window_x = self.config.getint("Settings", "window_x", fallback=100)
-                self.window_y = self.config.getint("Settings", "window_y", fallback=100)
-        except Exception:
-            pass
 
         self.taskbar_button = None
-        if windows_taskbar_available and sys.platform == "win32":
-            self.taskbar_button = QWinTaskbarButton(self)
-            self.windowHandleCreated = False
-            self.showEvent = self._showEvent
+        self.windowHandleCreated = False
 
         self.setWindowTitle(translations[self.language]["window_title"])
         icon_path = None
@@ -302,6 +3165,8 @@ class FluxWindow(QMainWindow):
             QPushButton:hover { background-color: #5a5a5a; }
             QStatusBar { background-color: #3c3c3c; color: #ffffff; }
             QTextEdit { background-color: #3c3c3c; color: #ffffff; border: none; font-size: 18px; border-radius: 5px; }
+            QListWidget { background-color: #3c3c3c; color: #ffffff; border: none; font-size: 18px; border-radius: 5px; }
+            QListView#log { background-color: #1e1e1e; color: #d0d0d0; border: none; border-radius: 5px; }
             QLabel { color: #ffffff; font-size: 18px; font-weight: bold; }
             QWidget#block {
                 background-color: #353535;
@@ -325,11 +3190,21 @@ class FluxWindow(QMainWindow):
         self.download_label = QLabel(translations[self.language]["download_label"])
         self.download_label.setAlignment(Qt.AlignCenter)
         block1_layout.addWidget(self.download_label)
-        self.url_input = QLineEdit()
+        url_layout = QHBoxLayout()
+        self.url_input = UrlInput()
         self.url_input.setPlaceholderText(translations[self.language]["url_placeholder"])
         self.url_input.setFont(QFont("Arial", 18))
         self.url_input.textChanged.connect(self.update_status_text)
-        block1_layout.addWidget(self.url_input)
+        url_layout.addWidget(self.url_input, stretch=1)
+        self.load_list_button = QPushButton(translations[self.language]["load_list"])
+        self.load_list_button.clicked.connect(self.load_url_list)
+        self.load_list_button.setFont(QFont("Arial", 18))
+        url_layout.addWidget(self.load_list_button)
+        self.watch_button = QPushButton(translations[self.language]["watch"])
+        self.watch_button.clicked.connect(self.toggle_watch)
+        self.watch_button.setFont(QFont("Arial", 18))
+        url_layout.addWidget(self.watch_button)
+        block1_layout.addLayout(url_layout)
         type_layout = QHBoxLayout()
         self.single_video_button = QPushButton(translations[self.language]["single_video"])
         self.playlist_button = QPushButton(translations[self.language]["playlist"])
@@ -389,7 +3264,7 @@ class FluxWindow(QMainWindow):
         block2_layout.addWidget(self.cookie_display)
 
         self.get_cookies_button = QPushButton(translations[self.language]["get_cookies"])
-        self.get_cookies_button.clicked.connect(lambda: webbrowser.open("https://github.com/yt-dlp/yt-dlp/wiki/Extractors#exporting-youtube-cookies"))
+        self.get_cookies_button.clicked.connect(lambda: open_url("https://github.com/yt-dlp/yt-dlp/wiki/Extractors#exporting-youtube-cookies"))
         self.get_cookies_button.setFont(QFont("Arial", 18))
         block2_layout.addWidget(self.get_cookies_button)
 
@@ -407,27 +3282,45 @@ class FluxWindow(QMainWindow):
         download_layout.addWidget(self.cancel_button, stretch=1)
         main_layout.addLayout(download_layout)
 
+        self.queue_list = QListWidget()
+        self.queue_list.setFont(QFont("Arial", 18))
+        self.queue_list.setFixedHeight(120)
+        self.queue_list.setVisible(False)
+        self.queue_list.currentItemChanged.connect(self.show_job_log)
+        main_layout.addWidget(self.queue_list)
+
+        self.log_model = LogModel(self)
+        self.log_view = QListView()
+        self.log_view.setObjectName("log")
+        self.log_view.setModel(self.log_model)
+        self.log_view.setUniformItemSizes(True)
+        self.log_view.setEditTriggers(QListView.NoEditTriggers)
+        self.log_view.setFont(QFont("Consolas", 10))
+        self.log_view.setFixedHeight(160)
+        self.log_view.setVisible(False)
+        main_layout.addWidget(self.log_view)
+
         links_layout = QHBoxLayout()
         links_layout.setSpacing(10)
         github_button = QPushButton("GitHub")
         github_icon_path = "github.png" if os.path.exists("github.png") else None
         if github_icon_path:
             github_button.setIcon(QIcon(github_icon_path))
-        github_button.clicked.connect(lambda: webbrowser.open("https://github.com/AlexanderNemchinov"))
+        github_button.clicked.connect(lambda: open_url("https://github.com/AlexanderNemchinov"))
         github_button.setFont(QFont("Arial", 18))
         links_layout.addWidget(github_button)
         paypal_button = QPushButton("PayPal")
         paypal_icon_path = "paypal.png" if os.path.exists("paypal.png") else None
         if paypal_icon_path:
             paypal_button.setIcon(QIcon(paypal_icon_path))
-        paypal_button.clicked.connect(lambda: webbrowser.open("https://www.paypal.com/paypalme/AlexanderNemchinov"))
+        paypal_button.clicked.connect(lambda: open_url("https://www.paypal.com/paypalme/AlexanderNemchinov"))
         paypal_button.setFont(QFont("Arial", 18))
         links_layout.addWidget(paypal_button)
         donationalerts_button = QPushButton("DonationAlerts")
         donationalerts_icon_path = "donationalerts.png" if os.path.exists("donationalerts.png") else None
         if donationalerts_icon_path:
             donationalerts_button.setIcon(QIcon(donationalerts_icon_path))
-        donationalerts_button.clicked.connect(lambda: webbrowser.open("https://www.donationalerts.com/c/Nemchinov"))
+        donationalerts_button.clicked.connect(lambda: open_url("https://www.donationalerts.com/c/Nemchinov"))
         donationalerts_button.setFont(QFont("Arial", 18))
         links_layout.addWidget(donationalerts_button)
         main_layout.addLayout(links_layout)
@@ -460,42 +3353,88 @@ class FluxWindow(QMainWindow):
 
         main_layout.addStretch(1)
         main_layout.insertStretch(2, 1)
-        main_layout.insertStretch(4, 1)
+        main_layout.insertStretch(5, 1)
 
         self.error_timer = QTimer(self)
         self.error_timer.setSingleShot(True)
         self.error_timer.timeout.connect(self.clear_status_text)
 
-        self.process = QProcess(self)
-        self.process.readyReadStandardOutput.connect(self.handle_output)
-        self.process.readyReadStandardError.connect(self.handle_error)
-        self.process.finished.connect(self.download_finished)
+        self.queue = build_queue(settings, self.database_file, self)
+        self.queue.job_added.connect(self.add_job_item)
+        self.queue.job_changed.connect(self.mark_job_dirty)
+        self.queue.progress_changed.connect(self.update_progress)
+        self.queue.status_changed.connect(self.show_status)
+        self.queue.queue_finished.connect(self.download_finished)
+        self.job_items = {}
+        self.watchlist = open_store(WatchList, self.database_file)
+        self.watcher = None
+        if self.watchlist:
+            self.watcher = SourceWatcher(self.watchlist, self.queue, self.watch_interval, self.watch_head_size, workers=self.watch_workers, parent=self)
+            self.watcher.found.connect(self.watch_found)
+
+        self.render_timer = QTimer(self)
+        self.render_timer.setInterval(max(1000 // max(self.progress_refresh_hz, 1), 1))
+        self.render_timer.timeout.connect(self.render_progress)
+        self.pending_progress = None
+        self.pending_status = None
+        self.displayed_progress = -1
+        self.dirty_jobs = set()
 
         self.download_type = None
         self.active_type_button = None
-        self.total_videos = 1
-        self.video_progress = {}
-        self.current_video_id = None
-        self.first_video_completed = False
 
-    def _showEvent(self, event):
-        super().showEvent(event)
-        if windows_taskbar_available and sys.platform == "win32" and not self.windowHandleCreated:
-            if self.windowHandle():
-                self.taskbar_button.setWindow(self.windowHandle())
-                self.windowHandleCreated = True
+        QTimer.singleShot(0, self.setup_taskbar_button)
+        QTimer.singleShot(0, self.locate_binaries)
+        QTimer.singleShot(0, self.offer_resume)
+
+    def setup_taskbar_button(self):
+        if sys.platform != "win32":
+            return
+        try:
+            from PyQt5.QtWinExtras import QWinTaskbarButton
+        except ImportError:
+            return
+        self.taskbar_button = QWinTaskbarButton(self)
+        if self.windowHandle():
+            self.taskbar_button.setWindow(self.windowHandle())
+            self.windowHandleCreated = True
+
+    def locate_binaries(self):
+        cache = self.config["Binaries"] if self.config.has_section("Binaries") else None
+        locator = BinaryLocator(cache, self)
+        locator.resolved.connect(self.apply_binaries)
+        locator.start()
+
+    def apply_binaries(self, binaries):
+        self.binaries = binaries
+        self.queue.set_binaries(binaries)
+        if self.watcher and not self.watcher.timer.isActive():
+            self.watcher.start()
+        if not os.environ.get("FLUX_YT_DLP"):
+            self.save_settings()
+        trace_startup("binaries")
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_painted:
+            self.first_painted = True
+            trace_startup("first_paint")
 
     def save_settings(self):
         try:
             if not self.config.has_section("Settings"):
                 self.config.add_section("Settings")
-            self.config.set("Settings", "language", self.language)
-            self.config.set("Settings", "cookie_file", self.cookie_file)
-            self.config.set("Settings", "download_path", self.download_path)
-            self.config.set("Settings", "window_width", str(self.width()))
-            self.config.set("Settings", "window_height", str(self.height()))
-            self.config.set("Settings", "window_x", str(self.x()))
-            self.config.set("Settings", "window_y", str(self.y()))
+            self.window_width, self.window_height = self.width(), self.height()
+            self.window_x, self.window_y = self.x(), self.y()
+            for key, default in settings_defaults.items():
+                value = getattr(self, key)
+                if isinstance(default, bool):
+                    value = "true" if value else "false"
+                elif key == "concurrent_fragments":
+                    value = value or "auto"
+                self.config.set("Settings", key, str(value))
+            if self.binaries and not os.environ.get("FLUX_YT_DLP"):
+                self.config.read_dict({"Binaries": binaries_cache(self.binaries)})
             with open(self.config_file, "w", encoding="utf-8") as configfile:
                 self.config.write(configfile)
         except Exception:
@@ -519,6 +3458,8 @@ class FluxWindow(QMainWindow):
         self.language_button.setText("EN" if self.language == "ru" else "RU")
         self.setWindowTitle(translations[self.language]["window_title"])
         self.url_input.setPlaceholderText(translations[self.language]["url_placeholder"])
+        self.load_list_button.setText(translations[self.language]["load_list"])
+        self.watch_button.setText(translations[self.language]["watch"])
         self.single_video_button.setText(translations[self.language]["single_video"])
         self.playlist_button.setText(translations[self.language]["playlist"])
         self.select_cookie_button.setText(translations[self.language]["select_cookie"])
@@ -537,6 +3478,8 @@ class FluxWindow(QMainWindow):
         self.cookie_label.setText("🍪 Cookies:")
 
         self.download_button.update_language(self.language)
+        for job in self.job_items:
+            self.update_job_item(job)
 
         if self.current_status_key:
             if self.current_status_key in ["error", "download_error", "warning"]:
@@ -619,39 +3562,6 @@ class FluxWindow(QMainWindow):
             self.path_display.setText(self.download_path if self.download_path else translations[self.language]["no_path"])
             self.save_settings()
 
-    def get_playlist_video_count(self, url):
-        try:
-            result = subprocess.run(
-                [yt_dlp_path, "--flat-playlist", "--dump-json", url],
-                capture_output=True,
-                text=True,
-                check=True,
-                encoding='utf-8',
-                creationflags=0x08000000
-            )
-            entries = [json.loads(line) for line in result.stdout.splitlines()]
-            return len(entries)
-        except Exception:
-            return 1
-
-    def get_video_title(self, url):
-        try:
-            args = [yt_dlp_path, "--get-title", "--no-playlist"]
-            if self.cookie_file and os.path.exists(self.cookie_file):
-                args.extend(["--cookies", self.cookie_file])
-            args.append(url)
-            result = subprocess.run(
-                args,
-                capture_output=True,
-                text=True,
-                check=True,
-                encoding='utf-8',
-                creationflags=0x08000000
-            )
-            return result.stdout.strip()
-        except Exception:
-            return "Unknown Title"
-
     def start_download(self):
         self.status_text.setText("")
         self.current_status_key = ""
@@ -675,171 +3585,196 @@ class FluxWindow(QMainWindow):
             self.error_timer.start(5000)
             return
 
-        self.download_button.setEnabled(False)
-        self.cancel_button.setVisible(True)
-        self.download_button.set_waiting()
-        self.completed_videos = 0
-        self.total_progress = 0.0
-        self.current_video_id = None
-        self.video_progress = {}
-        self.was_canceled = False
-        self.first_video_completed = False
-        self.current_status = ""
-        self.current_status_key = ""
-        self.total_videos = 1 if self.download_type == "single" else self.get_playlist_video_count(url)
+        self.begin_batch()
+        urls = extract_urls(url)
+        if len(urls) > 1:
+            self.enqueue_urls(urls)
+        else:
+            self.queue.enqueue(url, self.download_type, self.download_path, self.cookie_file)
+        self.url_input.clear()
+
+    def enqueue_urls(self, urls, download_type=None, download_path=None):
+        seen = {canonical_url(job.url, job.download_type)[0] for job in self.queue.jobs if job.state in ("queued", "running")}
+        unique = []
+        for url in urls:
+            url_type = detect_download_type(url) if download_type == "auto" else download_type or self.download_type
+            unique.extend((canonical, url_type) for canonical in unique_urls([url], url_type, seen))
+        for url, url_type in unique:
+            self.queue.enqueue(url, url_type, download_path or self.download_path, self.cookie_file)
+        self.show_status("urls_queued", {"count": len(unique), "duplicates": len(urls) - len(unique)})
+
+    def toggle_watch(self):
+        text = self.url_input.text().strip()
+        urls = extract_urls(text) or ([text] if text else [])
+        if not urls:
+            self.show_status("no_url", {})
+            return
+        if not self.watchlist:
+            return
+        if not os.path.exists(self.download_path):
+            self.show_status("invalid_path", {})
+            return
+        sources = list(OrderedDict.fromkeys(watch_url(url) for url in urls))
+        if all(self.watchlist.has(source) for source in sources):
+            for source in sources:
+                self.watchlist.remove(source)
+            self.show_status("watch_removed", {"count": len(sources)})
+        else:
+            for source in sources:
+                if not self.watchlist.has(source):
+                    self.watchlist.add(source, self.download_path, self.cookie_file)
+            self.show_status("watch_added", {"count": len(sources)})
+            if self.watcher and self.watcher.timer.isActive():
+                self.watcher.poll()
+        self.url_input.clear()
+
+    def watch_found(self, source, entries):
+        if not os.path.isdir(source["download_path"]):
+            return
+        self.begin_batch()
+        self.queue.enqueue(source["url"], "playlist", source["download_path"], source["cookie_file"], entries=entries)
+
+    def handle_remote(self, message):
+        if self.isMinimized():
+            self.showNormal()
+        self.raise_()
+        self.activateWindow()
+        urls = [url for url in message.get("urls") or [] if isinstance(url, str)]
+        if not urls:
+            return
+        download_path = message.get("output") or self.download_path
+        if not os.path.isdir(download_path):
+            self.show_status("invalid_path", {})
+            return
+        self.begin_batch()
+        self.enqueue_urls(urls, message.get("type") or "auto", download_path)
+
+    def load_url_list(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            translations[self.language]["load_list"],
+            "",
+            "URL lists (*.txt *.csv);;All files (*)"
+        )
+        if file_path:
+            self.url_input.load_files([file_path])
 
-        args = [
-            "-f", "bv+ba[acodec=opus][language=ru]+ba[acodec=opus][language=en]/ba[acodec=aac][language=ru]+ba[acodec=aac][language=en]/bv+ba/b",
-            "--audio-multistreams",
-            "--merge-output-format", "mkv",
-            "--embed-metadata",
-            "--embed-thumbnail",
-            "--convert-thumbnails", "png",
-            "--embed-chapters",
-            "--sleep-requests", "10",
-            "--sleep-interval", "10",
-            "--sponsorblock-mark", "all",
-            "--no-keep-fragments",
-        ]
+    def begin_batch(self):
+        if not self.queue.is_active() or self.queue.was_canceled:
+            self.download_button.set_waiting()
+            self.current_status = ""
+            self.current_status_key = ""
+            self.log_model.set_log(None)
+            self.log_view.setVisible(False)
+            self.queue_list.clear()
+            self.job_items = {}
+            self.dirty_jobs = set()
+            self.pending_progress = None
+            self.pending_status = None
+            self.displayed_progress = -1
+            if self.taskbar_button and self.windowHandleCreated:
+                self.taskbar_button.progress().setVisible(True)
+                self.taskbar_button.progress().setValue(0)
+        self.cancel_button.setVisible(True)
+        self.render_timer.start()
 
-        if self.cookie_file and os.path.exists(self.cookie_file):
-            args.extend(["--cookies", self.cookie_file])
+    def offer_resume(self):
+        records = self.queue.journal.unfinished() if self.queue.journal else []
+        if not records:
+            return
+        answer = QMessageBox.question(
+            self,
+            translations[self.language]["window_title"],
+            translations[self.language]["resume_prompt"].format(count=len(records)),
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.Yes
+        )
+        if answer != QMessageBox.Yes:
+            self.queue.journal.clear()
+            return
+        self.begin_batch()
+        for record in records:
+            self.queue.resume(record)
+
+    def add_job_item(self, job):
+        item = QListWidgetItem()
+        self.job_items[job] = item
+        self.queue_list.addItem(item)
+        self.queue_list.setVisible(True)
+        self.update_job_item(job)
+
+    def show_job_log(self, item, previous=None):
+        job = next((job for job, job_item in self.job_items.items() if job_item is item), None)
+        self.log_model.set_log(job.log if job else None)
+        self.log_view.setVisible(job is not None)
+        self.log_view.scrollToBottom()
+
+    def refresh_log(self):
+        if not self.log_view.isVisible():
+            return
+        scrollbar = self.log_view.verticalScrollBar()
+        following = scrollbar.value() >= scrollbar.maximum()
+        if self.log_model.refresh() and following:
+            self.log_view.scrollToBottom()
 
-        args.extend(["--no-playlist" if self.download_type == "single" else "--yes-playlist"])
-        output_template = os.path.join(self.download_path, "%(title)s.%(ext)s" if self.download_type == "single" else "%(playlist_title)s/%(title)s.%(ext)s")
-        args.extend(["-o", output_template, "--parse-metadata", "%(title)s:%(meta_title)s", "--parse-metadata", "%(playlist_title)s:%(meta_playlist_title)s"])
-        args.append(url)
+    def mark_job_dirty(self, job):
+        self.dirty_jobs.add(job)
 
-        self.process.setProcessChannelMode(QProcess.MergedChannels)
-        self.process.start(yt_dlp_path, args, QProcess.ReadWrite)
-        if not self.process.waitForStarted():
-            self.status_text.setText(translations[self.language]["yt_dlp_error"])
-            self.current_status = translations[self.language]["yt_dlp_error"]
-            self.current_status_key = "yt_dlp_error"
-            self.error_timer.start(5000)
-            self.download_button.setEnabled(True)
-            self.cancel_button.setVisible(False)
-            self.download_button.reset()
+    def update_job_item(self, job):
+        item = self.job_items.get(job)
+        if item is None:
+            return
+        if job.state == "running":
+            state = f"{int(job.progress)}%"
         else:
-            if self.taskbar_button and self.windowHandleCreated:
-                self.taskbar_button.progress().setVisible(True)
-                self.taskbar_button.progress().setValue(0)
+            state = translations[self.language][f"job_{job.state}"]
+        title = job.title or job.url
+        if job.filesize:
+            title = f"{title} ({format_bytes(job.filesize)})"
+        text = f"{title} — {state}"
+        if item.text() != text:
+            item.setText(text)
+
+    def show_status(self, key, kwargs):
+        if not key and self.render_timer.isActive():
+            self.pending_status = kwargs.get("text", "")
+            return
+        if key:
+            self.current_status = translations[self.language][key].format(**kwargs)
+        else:
+            self.current_status = kwargs.get("text", "")
+        self.current_status_key = key
+        self.status_text.setText(self.current_status)
+        if key:
+            self.error_timer.start(5000)
 
     def update_progress(self, total_percentage):
-        self.total_progress = total_percentage
-        self.download_button.set_progress(total_percentage)
-        if self.taskbar_button and self.windowHandleCreated:
-            self.taskbar_button.progress().setValue(int(total_percentage))
-
-    def handle_output(self):
-        output = str(self.process.readAllStandardOutput(), encoding='utf-8', errors='ignore')
-        for line in output.splitlines():
-            if "[download] Destination" in line:
-                filename_part = line.split("Destination:")[-1].strip()
-                self.current_status = os.path.splitext(os.path.basename(filename_part))[0]
+        self.pending_progress = total_percentage
+
+    def render_progress(self):
+        if self.pending_progress is not None:
+            self.total_progress = self.pending_progress
+            self.pending_progress = None
+            if int(self.total_progress) != self.displayed_progress:
+                self.displayed_progress = int(self.total_progress)
+                self.download_button.set_progress(self.total_progress)
+                if self.taskbar_button and self.windowHandleCreated:
+                    self.taskbar_button.progress().setValue(self.displayed_progress)
+        if self.pending_status is not None:
+            if self.pending_status != self.current_status or self.current_status_key:
+                self.current_status = self.pending_status
                 self.current_status_key = ""
                 self.status_text.setText(self.current_status)
-                self.current_video_id = filename_part
-                if self.current_video_id not in self.video_progress:
-                    self.video_progress[self.current_video_id] = {
-                        "thumbnail": 0.0,
-                        "download": 0.0,
-                        "audio": 0.0,
-                        "merging": 0.0,
-                        "audio_streams": 0,
-                        "postprocessing": False
-                    }
-                self.completed_videos += 1
-                if self.download_type == "single":
-                    self.total_videos = 1
-            elif "[ThumbnailsConvertor]" in line:
-                if self.current_video_id:
-                    self.video_progress[self.current_video_id]["thumbnail"] = 1.0
-            elif "[download]" in line and "%" in line and "of" in line:
-                if self.current_video_id:
-                    try:
-                        percent_str = line.split("%")[0].split()[-1]
-                        self.video_progress[self.current_video_id]["download"] = float(percent_str) / 100
-                    except (ValueError, IndexError):
-                        pass
-            elif "[ExtractAudio]" in line:
-                if self.current_video_id:
-                    self.video_progress[self.current_video_id]["audio_streams"] += 1
-                    audio_progress_per_stream = 1.0 / max(self.video_progress[self.current_video_id]["audio_streams"], 1)
-                    self.video_progress[self.current_video_id]["audio"] = min(
-                        self.video_progress[self.current_video_id]["audio"] + audio_progress_per_stream, 1.0
-                    )
-            elif "[Merger]" in line:
-                if self.current_video_id:
-                    self.video_progress[self.current_video_id]["merging"] = 1.0
-            elif "[Metadata]" in line or "[EmbedThumbnail]" in line:
-                if self.current_video_id:
-                    self.video_progress[self.current_video_id]["postprocessing"] = True
-            elif "[download] Finished downloading playlist" in line or (
-                self.download_type == "single" and
-                self.current_video_id and
-                self.video_progress[self.current_video_id]["merging"] == 1.0 and
-                self.video_progress[self.current_video_id]["postprocessing"]
-            ):
-                if self.download_type == "single" and not self.first_video_completed:
-                    self.first_video_completed = True
-                    self.process.terminate()
-                    self.process.waitForFinished(1000)
-                    if self.process.state() != QProcess.NotRunning:
-                        self.process.kill()
-                    self.download_button.set_completed()
-                    self.current_status = translations[self.language]["download_completed"]
-                    self.current_status_key = "download_completed"
-                    self.status_text.setText(self.current_status)
-                    self.error_timer.start(5000)
-                    self.cancel_button.setVisible(False)
-                    if self.taskbar_button and self.windowHandleCreated:
-                        self.taskbar_button.progress().setVisible(False)
-
-            total_progress = 0.0
-            for video_id, progress in self.video_progress.items():
-                thumbnail_weight = 0.10 if progress["thumbnail"] > 0 else 0.0
-                video_weight = 0.50 if progress["thumbnail"] > 0 else 0.60
-                audio_weight = 0.30
-                merging_weight = 0.10
-                total_weight = thumbnail_weight + video_weight + audio_weight + merging_weight
-                video_progress = (
-                    progress["thumbnail"] * thumbnail_weight +
-                    progress["download"] * video_weight +
-                    progress["audio"] * audio_weight +
-                    progress["merging"] * merging_weight
-                ) / total_weight if total_weight > 0 else 0.0
-                total_progress += video_progress / self.total_videos
-
-            total_percentage = min(total_progress * 99, 99)
-            self.update_progress(total_percentage)
-
-    def handle_error(self):
-        error = str(self.process.readAllStandardError(), encoding='utf-8', errors='ignore')
-        if error.strip() and not self.was_canceled:
-            url = self.url_input.text().strip().lower()
-            if ("youtube.com" in url or "youtu.be" in url) and "ERROR" in error.upper():
-                self.status_text.setText(translations[self.language]["youtube_cookie_error"])
-                self.current_status = translations[self.language]["youtube_cookie_error"]
-                self.current_status_key = "youtube_cookie_error"
-            elif "WARNING" in error:
-                if "unavailable videos are hidden" in error:
-                    count = error.split("INFO - ")[1].split(" ")[0]
-                    message = translations[self.language]["unavailable_videos"].format(count=count)
-                    self.status_text.setText(translations[self.language]["warning"].format(message=message))
-                    self.current_status = translations[self.language]["warning"].format(message=message)
-                    self.current_status_key = "unavailable_videos"
-                else:
-                    self.status_text.setText(translations[self.language]["warning"].format(message=error.strip()))
-                    self.current_status = translations[self.language]["warning"].format(message=error.strip())
-                    self.current_status_key = "warning"
-            else:
-                self.status_text.setText(translations[self.language]["download_error"].format(error=error.strip()))
-                self.current_status = translations[self.language]["download_error"].format(error=error.strip())
-                self.current_status_key = "download_error"
-            self.error_timer.start(5000)
-
-    def download_finished(self, exit_code, exit_status):
+            self.pending_status = None
+        dirty_jobs, self.dirty_jobs = self.dirty_jobs, set()
+        for job in dirty_jobs:
+            self.update_job_item(job)
+        self.refresh_log()
+
+    def download_finished(self, failed, canceled):
+        self.pending_progress = None
+        self.render_progress()
+        self.render_timer.stop()
         self.download_button.setEnabled(True)
         self.cancel_button.setVisible(False)
         if self.taskbar_button and self.windowHandleCreated:
@@ -847,46 +3782,31 @@ class FluxWindow(QMainWindow):
                 self.taskbar_button.progress().setVisible(False)
             except Exception:
                 pass
-        if exit_code == 0 or (self.download_type == "single" and self.first_video_completed):
+        if canceled:
+            self.download_button.reset()
+            self.show_status("download_canceled", {})
+        elif failed == 0:
             self.download_button.set_completed()
-            self.status_text.setText(translations[self.language]["download_completed"])
-            self.current_status = translations[self.language]["download_completed"]
-            self.current_status_key = "download_completed"
-            self.error_timer.start(5000)
+            self.show_status("download_completed", {})
         else:
             self.download_button.reset()
-            if self.was_canceled:
-                self.status_text.setText(translations[self.language]["download_canceled"])
-                self.current_status = translations[self.language]["download_canceled"]
-                self.current_status_key = "download_canceled"
-            else:
-                url = self.url_input.text().strip().lower()
-                if "youtube.com" in url or "youtu.be" in url:
-                    self.status_text.setText(translations[self.language]["youtube_cookie_error"])
-                    self.current_status = translations[self.language]["youtube_cookie_error"]
-                    self.current_status_key = "youtube_cookie_error"
-                else:
-                    self.status_text.setText(translations[self.language]["download_error"].format(error="Unknown error"))
-                    self.current_status = translations[self.language]["download_error"].format(error="Unknown error")
-                    self.current_status_key = "download_error"
+            if not self.current_status_key:
+                self.show_status("download_error", {"error": "Unknown error"})
             self.error_timer.start(5000)
-        self.was_canceled = False
-        self.first_video_completed = False
+        for job in [job for job in self.job_items if job.state in ("completed", "canceled")]:
+            self.queue_list.takeItem(self.queue_list.row(self.job_items.pop(job)))
+        self.queue_list.setVisible(bool(self.job_items))
+        if self.job_items and self.queue_list.currentItem() is None:
+            self.queue_list.setCurrentItem(next(iter(self.job_items.values())))
 
     def cancel_download(self):
-        if self.process.state() != QProcess.NotRunning:
-            self.was_canceled = True
-            self.process.terminate()
-            self.process.waitForFinished(1000)
-            if self.process.state() != QProcess.NotRunning:
-                self.process.kill()
+        self.queue.cancel_all()
+        self.render_timer.stop()
+        self.pending_progress = None
         self.download_button.setEnabled(True)
         self.cancel_button.setVisible(False)
         self.download_button.reset()
-        self.status_text.setText(translations[self.language]["download_canceled"])
-        self.current_status = translations[self.language]["download_canceled"]
-        self.current_status_key = "download_canceled"
-        self.error_timer.start(5000)
+        self.show_status("download_canceled", {})
         if self.taskbar_button and self.windowHandleCreated:
             try:
                 self.taskbar_button.progress().setVisible(False)
@@ -894,21 +3814,39 @@ class FluxWindow(QMainWindow):
                 pass
 
     def closeEvent(self, event):
-        if self.process.state() != QProcess.NotRunning:
-            self.process.terminate()
-            self.process.waitForFinished(1000)
-            if self.process.state() != QProcess.NotRunning:
-                self.process.kill()
-        if self.taskbar_button and self.windowHandleCreated:
-            try:
-                self.taskbar_button.progress().setVisible(False)
-            except Exception:
-                pass
-        self.save_settings()
-        event.accept()
+        try:
+            if self.watcher:
+                self.watcher.stop()
+        finally:
+            self.queue.shutdown()
+            if self.taskbar_button and self.windowHandleCreated:
+                try:
+                    self.taskbar_button.progress().setVisible(False)
+                except Exception:
+                    pass
+            self.save_settings()
+            event.accept()
 
 if __name__ == "__main__":
+    if "--stats" in sys.argv[1:]:
+        sys.exit(run_stats(sys.argv[1:]))
+    if "--headless" in sys.argv[1:]:
+        sys.exit(run_headless(sys.argv[1:]))
     app = QApplication(sys.argv)
+    launch = parse_launch_args(sys.argv[1:])
+    message = {
+        "urls": [url for arg in launch.urls for url in extract_urls(arg)],
+        "type": launch.type,
+        "output": os.path.abspath(launch.output) if launch.output else None,
+    }
+    instance_lock = lock_instance()
+    if instance_lock is None:
+        if send_to_instance(message):
+            sys.exit(0)
+        print("Flux: the running instance did not accept the URLs", file=sys.stderr)
+        sys.exit(1)
+    instance = InstanceServer(app)
+    instance.listen()
     icon_path = None
     for ext in ["icon.png", "icon.ico"]:
         if os.path.exists(ext):
@@ -918,4 +3856,9 @@ if __name__ == "__main__":
         app.setWindowIcon(QIcon(icon_path))
     window = FluxWindow()
     window.show()
+    instance.received.connect(window.handle_remote)
+    if message["urls"]:
+        QTimer.singleShot(0, lambda: window.handle_remote(message))
+    if launch.profile:
+        sys.exit(run_profiled(launch.profile, app.exec_))
     sys.exit(app.exec_())
@@ -0,0 +1,98 @@
+"""
+Stand-in for yt-dlp that replays a transcript instead of downloading.
+
+Point Flux at it with FLUX_YT_DLP=bench/fake_yt_dlp.py. It is configured through
+environment variables because Flux passes real yt-dlp arguments:
+
+    FLUX_FAKE_TRANSCRIPT     transcript replayed for every video (default: transcripts/youtube_dash.txt)
+    FLUX_FAKE_PLAYLIST_SIZE  number of videos in a playlist (default: 5)
+    FLUX_FAKE_RATE           output lines per second, 0 for as fast as possible (default: 0)
+
+Transcripts hold one output line each, with $id, $title, $extractor, $filepath and
+$now (the time the line is written) substituted per video.
+"""
+
+import json
+import os
+import sys
+import time
+from string import Template
+
+bench_path = os.path.dirname(os.path.abspath(__file__))
+
+def load_transcript():
+    path = os.environ.get("FLUX_FAKE_TRANSCRIPT") or os.path.join(bench_path, "transcripts", "youtube_dash.txt")
+    with open(path, "r", encoding="utf-8") as f:
+        return [Template(line.rstrip("\n")) for line in f if line.strip()]
+
+def playlist_entries(url, size):
+    return [
+        {
+            "_type": "url",
+            "ie_key": "Youtube",
+            "id": f"fake{index:05d}",
+            "url": f"https://www.youtube.com/watch?v=fake{index:05d}",
+            "title": f"Fake video {index}",
+            "playlist_id": "PLfake",
+            "playlist_title": "Fake playlist",
+            "extractor": "youtube:tab",
+            "extractor_key": "YoutubeTab",
+            "webpage_url": url,
+        }
+        for index in range(size)
+    ]
+
+def replay(transcript, entries, output_dir, rate):
+    interval = 1.0 / rate if rate > 0 else 0.0
+    next_line = time.monotonic()
+    out = sys.stdout
+    for entry in entries:
+        values = {
+            "id": entry["id"],
+            "title": entry.get("title") or entry["id"],
+            "extractor": "Youtube",
+            "filepath": os.path.join(output_dir, f"{entry['id']}.mkv").replace("\\", "/"),
+        }
+        for line in transcript:
+            if interval:
+                next_line += interval
+                delay = next_line - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            values["now"] = repr(time.time())
+            out.write(line.safe_substitute(values) + "\n")
+            out.flush()
+
+def main(args):
+    url = args[-1] if args else ""
+    size = int(os.environ.get("FLUX_FAKE_PLAYLIST_SIZE", "5"))
+    rate = float(os.environ.get("FLUX_FAKE_RATE", "0"))
+
+    if "--playlist-items" in args:
+        size = min(size, int(args[args.index("--playlist-items") + 1].split(":")[-1]))
+
+    if "--flat-playlist" in args:
+        for entry in playlist_entries(url, size):
+            print(json.dumps(entry), flush=True)
+        return 0
+    if "--version" in args:
+        print("fake")
+        return 0
+    if "--get-title" in args:
+        print("Fake video 0")
+        return 0
+
+    if "--load-info-json" in args:
+        with open(args[args.index("--load-info-json") + 1], "r", encoding="utf-8") as f:
+            info = json.load(f)
+        entries = info.get("entries") or ([info] if info.get("id") else [])
+    elif "--yes-playlist" in args:
+        entries = playlist_entries(url, size)
+    else:
+        entries = playlist_entries(url, 1)
+    output_dir = os.path.dirname(args[args.index("-o") + 1]) if "-o" in args else "."
+    replay(load_transcript(), entries, output_dir, rate)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,220 @@
+"""
+Flux benchmarks, run against bench/fake_yt_dlp.py instead of live sites.
+
+    python bench/run_benchmarks.py [--downloads N] [--playlist-size N] [--jobs N] [--rate N] [--transcript FILE] [--json FILE]
+
+Reports parser throughput, progress-update latency, repaint counts of the main
+window, peak memory (Python allocations of the window run, and process RSS where
+the platform reports it) and end-to-end queue throughput. Every run works in a
+temporary directory, so settings.ini and flux.db of a real installation are
+never touched.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+bench_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(bench_path))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ["FLUX_YT_DLP"] = os.path.join(bench_path, "fake_yt_dlp.py")
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+
+import Flux
+import fake_yt_dlp
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def transcript_bytes(min_lines):
+    transcript = fake_yt_dlp.load_transcript()
+    lines = []
+    index = 0
+    while len(lines) < min_lines:
+        values = {"id": f"fake{index:05d}", "title": f"Fake video {index}", "extractor": "Youtube", "filepath": f"/tmp/fake{index:05d}.mkv", "now": "0"}
+        lines.extend(line.safe_substitute(values) for line in transcript)
+        index += 1
+    return ("\n".join(lines) + "\n").encode("utf-8"), len(lines)
+
+def bench_parser(min_lines=200000, chunk_size=65536):
+    data, line_count = transcript_bytes(min_lines)
+    parser = Flux.OutputParser()
+    started = time.perf_counter()
+    events = []
+    for offset in range(0, len(data), chunk_size):
+        events.extend(parser.feed(data[offset:offset + chunk_size]))
+    events.extend(parser.flush())
+    parse_seconds = time.perf_counter() - started
+
+    queue = Flux.DownloadQueue()
+    job = Flux.DownloadJob("https://www.youtube.com/playlist?list=PLfake", "playlist", tempfile.gettempdir(), "")
+    job.total_videos = max(1, sum(1 for event in events if event.kind == "video"))
+    queue.jobs = [job]
+    started = time.perf_counter()
+    for offset in range(0, len(events), 64):
+        queue.handle_events(job, events[offset:offset + 64])
+    progress_seconds = time.perf_counter() - started
+    return {
+        "parser_lines": line_count,
+        "parser_lines_per_second": round(line_count / parse_seconds),
+        "progress_events_per_second": round(len(events) / progress_seconds),
+    }
+
+def watch_latency(queue, latencies):
+    last_sent = {}
+    handle_event = queue.handle_event
+
+    def timed_handle_event(job, event):
+        if event.kind == "progress" and isinstance(event.value.get("sent"), (int, float)):
+            last_sent[job] = event.value["sent"]
+        handle_event(job, event)
+
+    def progress_changed(value):
+        now = time.time()
+        for job in queue.running:
+            sent = last_sent.pop(job, None)
+            if sent is not None:
+                latencies.append(now - sent)
+
+    queue.handle_event = timed_handle_event
+    queue.progress_changed.connect(progress_changed)
+
+def bench_queue(app, downloads, playlist_size, jobs, timeout):
+    queue = Flux.DownloadQueue(jobs, engine="external")
+    latencies = []
+    watch_latency(queue, latencies)
+    result = {}
+
+    def finished(failed, canceled):
+        result["seconds"] = time.perf_counter() - started
+        result["failed"] = failed
+        app.quit()
+
+    queue.queue_finished.connect(finished)
+    QTimer.singleShot(timeout * 1000, app.quit)
+    started = time.perf_counter()
+    for index in range(downloads):
+        queue.enqueue(f"https://www.youtube.com/playlist?list=PLfake{index}", "playlist", os.getcwd(), "")
+    app.exec_()
+    queue.shutdown()
+    seconds = result.get("seconds", float(timeout))
+    videos = downloads * playlist_size
+    return {
+        "queue_seconds": round(seconds, 3),
+        "queue_videos_per_second": round(videos / seconds, 2),
+        "queue_failed_jobs": result.get("failed", downloads),
+        "latency_ms_median": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "latency_ms_p95": round(percentile(latencies, 0.95) * 1000, 2),
+        "latency_ms_max": round(max(latencies, default=0.0) * 1000, 2),
+    }
+
+def bench_window(app, downloads, jobs, timeout):
+    counts = {"button_paints": 0, "button_texts": 0, "job_item_updates": 0}
+
+    def counted(cls, name, key):
+        original = getattr(cls, name)
+
+        def wrapper(self, *args, **kwargs):
+            counts[key] += 1
+            return original(self, *args, **kwargs)
+
+        setattr(cls, name, wrapper)
+        return original
+
+    originals = [
+        (Flux.DownloadButton, "paintEvent", counted(Flux.DownloadButton, "paintEvent", "button_paints")),
+        (Flux.DownloadButton, "setText", counted(Flux.DownloadButton, "setText", "button_texts")),
+        (Flux.FluxWindow, "update_job_item", counted(Flux.FluxWindow, "update_job_item", "job_item_updates")),
+    ]
+    tracemalloc.start()
+    window = Flux.FluxWindow()
+    try:
+        window.queue.engine = "external"
+        window.queue.max_workers = jobs
+        window.download_path = os.getcwd()
+        window.download_type = "playlist"
+        window.show()
+        result = {}
+
+        def finished(failed, canceled):
+            result["seconds"] = time.perf_counter() - started
+            QTimer.singleShot(100, app.quit)
+
+        window.queue.queue_finished.connect(finished)
+        QTimer.singleShot(timeout * 1000, app.quit)
+        started = time.perf_counter()
+        for index in range(downloads):
+            window.url_input.setText(f"https://www.youtube.com/playlist?list=PLwindow{index}")
+            window.start_download()
+        app.exec_()
+        window.queue.shutdown()
+        window.hide()
+    finally:
+        counts["python_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+        tracemalloc.stop()
+        for cls, name, original in originals:
+            setattr(cls, name, original)
+    counts["window_seconds"] = round(result.get("seconds", float(timeout)), 3)
+    return counts
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Measure Flux overhead against a fake yt-dlp.")
+    parser.add_argument("--downloads", type=int, default=4, help="playlist URLs queued per run (default: 4)")
+    parser.add_argument("--playlist-size", type=int, default=5, help="videos per playlist (default: 5)")
+    parser.add_argument("--jobs", type=int, default=3, help="concurrent downloads (default: 3)")
+    parser.add_argument("--rate", type=float, default=0, help="fake output lines per second, 0 for unthrottled (default: 0)")
+    parser.add_argument("--transcript", help="transcript to replay (default: bench/transcripts/youtube_dash.txt)")
+    parser.add_argument("--timeout", type=int, default=300, help="seconds before a run is abandoned (default: 300)")
+    parser.add_argument("--json", metavar="FILE", help="also write the results to FILE")
+    args = parser.parse_args(argv)
+
+    os.environ["FLUX_FAKE_PLAYLIST_SIZE"] = str(args.playlist_size)
+    os.environ["FLUX_FAKE_RATE"] = str(args.rate)
+    if args.transcript:
+        os.environ["FLUX_FAKE_TRANSCRIPT"] = os.path.abspath(args.transcript)
+
+    results = {}
+    app = QApplication(sys.argv[:1])
+    workdir = tempfile.TemporaryDirectory(prefix="flux-bench-")
+    cwd = os.getcwd()
+    os.chdir(workdir.name)
+    try:
+        results.update(bench_parser())
+        results.update(bench_queue(app, args.downloads, args.playlist_size, args.jobs, args.timeout))
+        results.update(bench_window(app, args.downloads, args.jobs, args.timeout))
+    finally:
+        os.chdir(cwd)
+    results["rss_peak_mb"] = peak_rss_mb()
+    workdir.cleanup()
+
+    width = max(map(len, results))
+    for key, value in results.items():
+        print(f"{key.ljust(width)}  {value}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
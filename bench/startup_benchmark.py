@@ -0,0 +1,83 @@
+"""
+Flux start-up benchmark.
+
+    python bench/startup_benchmark.py [--runs N] [--timeout SECONDS] [--json FILE]
+
+Launches the GUI in a fresh temporary directory and reports the median time from
+process spawn to the first paint of the main window and to the moment yt-dlp and
+ffmpeg have been located. "cold" runs start without a settings.ini, "warm" runs
+reuse the [Binaries] section the last cold run saved. Uses the real yt-dlp from
+bin/ or PATH, since the cached discovery is what is being measured.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+bench_path = os.path.dirname(os.path.abspath(__file__))
+flux_path = os.path.join(os.path.dirname(bench_path), "Flux.py")
+
+def launch(workdir, timeout):
+    env = dict(os.environ, FLUX_STARTUP_TRACE="1")
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env.pop("FLUX_YT_DLP", None)
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, flux_path], cwd=workdir, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    stages = {}
+    try:
+        for line in process.stdout:
+            parts = line.split()
+            if len(parts) == 3 and parts[0] == "startup":
+                stages[parts[1]] = time.perf_counter() - started
+            if {"first_paint", "binaries"} <= stages.keys() or time.perf_counter() - started > timeout:
+                break
+    finally:
+        process.kill()
+        process.wait()
+    return stages
+
+def summarize(runs, stage):
+    values = [run[stage] for run in runs if stage in run]
+    return round(statistics.median(values) * 1000, 1) if values else None
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Measure how fast the Flux window comes up.")
+    parser.add_argument("--runs", type=int, default=5, help="launches per mode (default: 5)")
+    parser.add_argument("--timeout", type=int, default=60, help="seconds before a launch is abandoned (default: 60)")
+    parser.add_argument("--json", metavar="FILE", help="also write the results to FILE")
+    args = parser.parse_args(argv)
+
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="flux-startup-")
+    try:
+        cold = []
+        for _ in range(args.runs):
+            settings = os.path.join(workdir, "settings.ini")
+            if os.path.exists(settings):
+                os.remove(settings)
+            cold.append(launch(workdir, args.timeout))
+        # The last cold run left its [Binaries] section behind for the warm runs.
+        warm = [launch(workdir, args.timeout) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for mode, runs in (("cold", cold), ("warm", warm)):
+        results[f"{mode}_first_paint_ms"] = summarize(runs, "first_paint")
+        results[f"{mode}_binaries_ms"] = summarize(runs, "binaries")
+
+    width = max(map(len, results))
+    for key, value in results.items():
+        print(f"{key.ljust(width)}  {value}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))